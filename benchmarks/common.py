@@ -0,0 +1,56 @@
+"""Offline fixtures shared by the benchmarks, nothing here touches the network"""
+from io import StringIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pstatmodel.utils import DATA_CONTAINTER
+
+EC_FIXTURE = Path(__file__).parents[1] / "tests" / "data" / "ec_ersstv5.txt"
+
+
+def synthetic_selection(nrows, ncols, nsignal=6, seed=0):
+    """Candidate table and a target driven by its first ``nsignal`` columns"""
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(
+        rng.standard_normal((nrows, ncols)),
+        columns=[f"var{idx}" for idx in range(ncols)],
+    )
+    coefs = rng.uniform(0.5, 1.5, nsignal)
+    y = pd.Series(X.iloc[:, :nsignal].to_numpy() @ coefs + rng.standard_normal(nrows))
+    return X, y
+
+
+def monthly_table(name="col1", iyear=1950, fyear=2021, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(f"{iyear}-01-01", f"{fyear}-12-31", freq="MS")
+    return pd.DataFrame(
+        {"time": dates + pd.Timedelta("14D"), name: rng.standard_normal(dates.size)}
+    )
+
+
+def daily_table(iyear=1975, fyear=2021, seed=0):
+    """Daily table with the RMM columns"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(f"{iyear}-01-01", f"{fyear}-12-31", freq="1D")
+    columns = DATA_CONTAINTER["RMM"]["variable"]
+    data = rng.standard_normal((dates.size, len(columns)))
+    return pd.concat(
+        [pd.DataFrame({"time": dates}), pd.DataFrame(data, columns=columns)], axis=1
+    )
+
+
+def wide_source(variable="NAO", iyear=1950, fyear=2021, seed=0):
+    """Text in the layout of the psl.noaa.gov correlation tables"""
+    rng = np.random.default_rng(seed)
+    lines = [f"{iyear:5d}{fyear - 1:5d}"]
+    for year in range(iyear, fyear):
+        values = "".join(f"{value:7.2f}" for value in rng.standard_normal(12))
+        lines.append(f"{year:5d}{values}")
+    lines += ["  -99.9", f"  {variable} index", "  offline fixture"]
+    return "\n".join(lines) + "\n"
+
+
+def as_source(text):
+    return StringIO(text)
@@ -0,0 +1,41 @@
+from pstatmodel.stepwise.base import stepwise_selection, stepwise_selection_multi
+from pstatmodel.stepwise.gram import GramMatrix
+
+from .common import synthetic_selection
+
+
+class StepwiseSelection:
+    params = ([50, 300, 2000], [36, 80])
+    param_names = ["ncols", "nrows"]
+    timeout = 300
+
+    def setup(self, ncols, nrows):
+        self.X, self.y = synthetic_selection(nrows, ncols)
+        self.gram = GramMatrix(self.X)
+
+    def time_stepwise_selection(self, ncols, nrows):
+        stepwise_selection(self.X, self.y, verbose=False)
+
+    def time_stepwise_selection_gram(self, ncols, nrows):
+        stepwise_selection(self.X, self.y, verbose=False, gram=self.gram)
+
+    def time_gram_matrix(self, ncols, nrows):
+        GramMatrix(self.X)
+
+    def peakmem_stepwise_selection(self, ncols, nrows):
+        stepwise_selection(self.X, self.y, verbose=False)
+
+
+class StepwiseSelectionMulti:
+    params = [8, 32]
+    param_names = ["ntargets"]
+    timeout = 300
+
+    def setup(self, ntargets):
+        self.X, _ = synthetic_selection(36, 300)
+        self.Y = {
+            idx: synthetic_selection(36, 300, seed=idx)[1] for idx in range(ntargets)
+        }
+
+    def time_stepwise_selection_multi(self, ntargets):
+        stepwise_selection_multi(self.X, self.Y, verbose=False)
@@ -0,0 +1,45 @@
+from pstatmodel import utils
+
+from .common import as_source, daily_table, monthly_table, wide_source
+
+
+class ShiftPredictor:
+    params = [False, True]
+    param_names = ["use_seasons"]
+
+    def setup(self, use_seasons):
+        self.table = monthly_table()
+
+    def time_shift_predictor(self, use_seasons):
+        utils.shift_predictor(
+            self.table, "col1", "08", fyear=2021, use_seasons=use_seasons
+        )
+
+
+class WideToLong:
+    def setup(self):
+        self.text = wide_source()
+        self.parse_kwargs = utils.DATA_CONTAINTER["NAO"]["parse_kwargs"]
+
+    def time_wide_to_long(self):
+        utils.wide_to_long(
+            as_source(self.text),
+            "NAO",
+            parse_kwargs=self.parse_kwargs,
+            FILL_VALUE=-99.9,
+        )
+
+
+class DailyResamplers:
+    def setup(self):
+        self.table = daily_table()
+        self.decades = utils.decadeResampler(self.table)
+
+    def time_decadeResampler(self):
+        utils.decadeResampler(self.table)
+
+    def time_monthResampler(self):
+        utils.monthResampler(self.table)
+
+    def time_splitByDay(self):
+        utils.splitByDay(self.decades)
@@ -0,0 +1,30 @@
+import pandas as pd
+
+from pstatmodel import ModelVariables
+
+from .common import EC_FIXTURE, daily_table, monthly_table
+
+
+class GetDatatable:
+    def setup(self):
+        self.model = ModelVariables(variables={})
+        self.model.register_variable(
+            "EC_index", ["E_add", "C_add"], pd.read_csv(EC_FIXTURE, parse_dates=[0])
+        )
+        for idx in range(10):
+            name = f"index{idx}"
+            self.model.register_variable(name, name, monthly_table(name, seed=idx))
+        self.model.register_variable(
+            "RMM",
+            ["RMM1", "RMM2", "amplitude"],
+            daily_table(),
+            resample=["months", "decades"],
+            period=[-7, 12],
+        )
+        self.model.shiftAllVariables(init_month="08", fyear=2021)
+
+    def time_shiftAllVariables(self):
+        self.model.shiftAllVariables(init_month="08", fyear=2021)
+
+    def time_get_datatable(self):
+        self.model.get_datatable()
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from time import perf_counter, sleep, time
+from typing import List, Optional, Tuple, Union
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+# per-thread deadline set by source_deadline
+_thread = threading.local()
+_UNSET = object()
+RETRY_STATUS = (429, 500, 502, 503, 504)
+# cached files are named after the sha256 of their url
+_KEY = re.compile("[0-9a-f]{64}")
+
+
+class OfflineError(requests.ConnectionError):
+    """Raised in offline mode for a source with no cached copy"""
+
+
+@contextmanager
+def source_deadline(seconds: Optional[float]):
+    """Give the requests made by the calling thread inside the block
+    ``seconds`` in total, retries and backoff included, None for no limit"""
+    previous = getattr(_thread, "deadline", _UNSET)
+    _thread.deadline = None if seconds is None else perf_counter() + seconds
+    try:
+        yield
+    finally:
+        if previous is _UNSET:
+            del _thread.deadline
+        else:
+            _thread.deadline = previous
+
+
+@dataclass
+class FetchTiming:
+    url: str
+    outcome: str
+    status: Optional[int] = None
+    nbytes: int = 0
+    elapsed: float = 0.0
+
+
+class Fetcher:
+    """Pooled HTTP client every source download goes through
+
+    One requests.Session keeps up to ``pool_maxsize`` keep-alive
+    connections per host, so files from the same server share connections
+    and TLS handshakes. Failed connections and 429/5xx answers are retried
+    up to ``retries`` times, waiting ``backoff`` * 2^n seconds between
+    attempts; a read timeout is not retried, it already cost the whole
+    timeout. Bodies are read in ``chunk_size`` chunks.
+    """
+
+    def __init__(
+        self,
+        retries: int = 3,
+        backoff: float = 0.5,
+        pool_maxsize: int = 4,
+        chunk_size: int = 1 << 16,
+    ) -> None:
+        self.retries = retries
+        self.backoff = backoff
+        self.chunk_size = chunk_size
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _get(self, url: str, headers: Optional[dict], timeout: Optional[float]):
+        with self.session.get(
+            url, headers=headers, timeout=timeout, stream=True
+        ) as response:
+            body = bytearray()
+            for chunk in response.iter_content(self.chunk_size):
+                body += chunk
+        return response, bytes(body)
+
+    def get(
+        self,
+        url: str,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> Tuple[requests.Response, bytes]:
+        """Response of ``url`` and its body, read as a stream
+
+        ``timeout`` bounds each attempt and ``deadline``, a perf_counter
+        value, all of them: no attempt starts or waits past it.
+        """
+        for attempt in range(self.retries + 1):
+            _timeout = timeout
+            if deadline is not None:
+                remaining = deadline - perf_counter()
+                if remaining <= 0:
+                    raise requests.Timeout(f"{url} ran out of time")
+                _timeout = remaining if timeout is None else min(timeout, remaining)
+            try:
+                response, body = self._get(url, headers, _timeout)
+            except requests.ConnectionError:
+                # connect timeouts land here, read timeouts propagate
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS or attempt == self.retries:
+                    return response, body
+            wait = self.backoff * 2**attempt
+            if deadline is not None:
+                wait = min(wait, max(deadline - perf_counter(), 0))
+            sleep(wait)
+
+
+FETCHER = Fetcher()
+
+
+class DownloadCache:
+    """Persistent cache of the remote sources, revalidated with the server
+
+    Each body is stored under ``directory`` together with its ETag and
+    Last-Modified headers. A copy younger than ``ttl`` seconds is used
+    without contacting the server; an older one is revalidated with a
+    conditional request and only downloaded again when it changed. In
+    ``offline`` mode only cached copies are used, whatever their age.
+
+    The defaults come from the PSTATMODEL_CACHE_DIR, PSTATMODEL_CACHE_TTL
+    and PSTATMODEL_OFFLINE environment variables, falling back to
+    ``~/.cache/pstatmodel``, one hour and online. Each request gives up
+    after ``timeout`` seconds without an answer, and all of them within a
+    ``source_deadline`` block share its time. Requests go through
+    ``fetcher``, the
+    shared FETCHER when None. Every fetch appends a FetchTiming to
+    ``timings`` with its outcome: "cached", "offline", "not-modified" or
+    "downloaded".
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path, None] = None,
+        ttl: Optional[float] = None,
+        offline: Optional[bool] = None,
+        timeout: Optional[float] = 60.0,
+        fetcher: Optional[Fetcher] = None,
+    ) -> None:
+        if directory is None:
+            directory = os.environ.get(
+                "PSTATMODEL_CACHE_DIR", Path.home() / ".cache" / "pstatmodel"
+            )
+        if ttl is None:
+            ttl = float(os.environ.get("PSTATMODEL_CACHE_TTL", 3600))
+        if offline is None:
+            flag = os.environ.get("PSTATMODEL_OFFLINE", "").strip().lower()
+            offline = flag in ("1", "true", "yes", "on")
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.offline = offline
+        self.timeout = timeout
+        self.fetcher = fetcher
+        self.timings: List[FetchTiming] = []
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.directory / f"{key}.body", self.directory / f"{key}.json"
+
+    def _read(self, url: str):
+        body, meta = self._paths(url)
+        if not (body.exists() and meta.exists()):
+            return None
+        return body.read_bytes(), json.loads(meta.read_text())
+
+    def _write(self, url: str, content: bytes, info: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        body, meta = self._paths(url)
+        # write then rename so concurrent readers never see a partial body
+        for path, data in [(body, content), (meta, json.dumps(info).encode())]:
+            partial = path.with_suffix(
+                f"{path.suffix}.{os.getpid()}.{threading.get_ident()}"
+            )
+            partial.write_bytes(data)
+            partial.replace(path)
+
+    def fetch(self, url: str, headers: Optional[dict] = None) -> str:
+        """Text of ``url``, from the cache when it is still valid"""
+        start = perf_counter()
+
+        def _done(text: str, outcome: str, status=None, nbytes=0) -> str:
+            self.timings.append(
+                FetchTiming(url, outcome, status, nbytes, perf_counter() - start)
+            )
+            return text
+
+        cached = self._read(url)
+        if cached is not None:
+            content, info = cached
+            if self.offline or time() - info["fetched"] < self.ttl:
+                outcome = "offline" if self.offline else "cached"
+                return _done(content.decode(info["encoding"]), outcome)
+        elif self.offline:
+            raise OfflineError(f"{url} is not cached and downloads are disabled")
+
+        headers = dict(headers or {})
+        if cached is not None:
+            if info.get("etag"):
+                headers["If-None-Match"] = info["etag"]
+            if info.get("last_modified"):
+                headers["If-Modified-Since"] = info["last_modified"]
+        fetcher = FETCHER if self.fetcher is None else self.fetcher
+        response, body = fetcher.get(
+            url,
+            headers=headers,
+            timeout=self.timeout,
+            deadline=getattr(_thread, "deadline", None),
+        )
+        if cached is not None and response.status_code == 304:
+            info["fetched"] = time()
+            self._write(url, content, info)
+            return _done(content.decode(info["encoding"]), "not-modified", 304)
+        response.raise_for_status()
+        info = dict(
+            url=url,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            encoding=response.encoding or "utf-8",
+            fetched=time(),
+        )
+        self._write(url, body, info)
+        return _done(
+            body.decode(info["encoding"]), "downloaded", response.status_code, len(body)
+        )
+
+    def timings_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [asdict(timing) for timing in self.timings],
+            columns=list(FetchTiming.__dataclass_fields__),
+        )
+
+    def clear(self) -> None:
+        """Remove the files this cache wrote, leaving anything else in
+        ``directory`` alone"""
+        for path in self.directory.glob("*.*"):
+            if path.suffix in (".body", ".json") and _KEY.fullmatch(path.stem):
+                path.unlink()
+
+
+DOWNLOAD_CACHE = DownloadCache()
+
+
+def fetch_text(
+    url: str, headers: Optional[dict] = None, cache: Optional[DownloadCache] = None
+) -> str:
+    """Text of ``url`` through ``cache``, DOWNLOAD_CACHE when None"""
+    return (DOWNLOAD_CACHE if cache is None else cache).fetch(url, headers=headers)
@@ -2,6 +2,61 @@ import numpy as np
 import pandas as pd
 import statsmodels.api as sm
 
+from pstatmodel.stepwise.cache import CachedOLS, SubsetCache
+from pstatmodel.stepwise.engine import ENGINES, GramOLS, score_alone
+from pstatmodel.stepwise.gram import GramMatrix
+from pstatmodel.stepwise.result import CompactResult
+from pstatmodel.stepwise.screening import screen_candidates
+from pstatmodel.stepwise.subset import CRITERIA
+from pstatmodel.stepwise.trace import SelectionTrace
+
+
+def _search_data(X, y, engine, gram, missing, rows):
+    """Whether y can be searched, the GramMatrix the search reads and the
+    table and target a string engine without one is built on"""
+    valid = ~np.isnan(np.asarray(y, dtype=float))
+    if not valid.all() and missing != "drop":
+        return False, gram, X, y
+    if not isinstance(engine, str):
+        return True, gram, X, y
+    if gram is not None or engine == "gram":
+        gram = GramMatrix(X) if gram is None else gram
+        if rows is not None:
+            gram = gram.resampled(rows)
+        if not valid.all():
+            gram = gram.masked(valid)
+        return True, gram, X, y
+    # "qr" and "statsmodels" fit the rows themselves
+    if rows is not None:
+        X = X.iloc[rows]
+    if not valid.all():
+        X, y = X[valid], np.asarray(y, dtype=float)[valid]
+    return True, gram, X, y
+
+
+def _search_engine(X, y, engine, gram, cache):
+    if not isinstance(engine, str):
+        ols = engine
+    elif gram is not None:
+        ols = GramOLS(X, y, gram=gram)
+    else:
+        ols = ENGINES[engine](X, y)
+    if cache is not False:
+        ols = CachedOLS(ols, SubsetCache() if cache is None else cache)
+    return ols
+
+
+def _excluded(columns, included):
+    # the candidate order of a forward step, shared with the batched first step
+    return list(set(columns) - set(included))
+
+
+def _final_model(X, y, columns, compact, rows):
+    if compact:
+        return CompactResult.fit(X, y, columns, rows=rows)
+    _X = X[columns] if rows is None else X[columns].iloc[rows]
+    return sm.OLS(y, sm.add_constant(_X), missing="drop").fit()
+
 
 def stepwise_selection(
     X,
@@ -12,6 +67,14 @@ def stepwise_selection(
     verbose=True,
     max_vars=12,
     min_vars=4,
+    engine="qr",
+    gram=None,
+    cache=None,
+    compact=False,
+    screen=None,
+    trace=None,
+    missing="none",
+    rows=None,
 ):
     """Perform a forward-backward feature selection
     based on p-value from statsmodels.api.OLS
@@ -22,47 +85,103 @@ def stepwise_selection(
         threshold_in - include a feature if its p-value < threshold_in
         threshold_out - exclude a feature if its p-value > threshold_out
         verbose - whether to print the sequence of inclusions and exclusions
+        engine - OLS engine used during the search, "qr" updates a QR
+            factorisation column by column, "gram" reads every subset
+            regression from a GramMatrix of X and "statsmodels" refits
+            statsmodels.api.OLS for every candidate. An engine already
+            built for X and y is used as is
+        gram - GramMatrix of X to share between calls, reads every subset
+            regression from its cross-products (implies engine="gram")
+        cache - SubsetCache memoising subset fits across threshold restarts,
+            a fresh one is used when None and False disables it. Pass the
+            same instance to calls on the same X and y to share it
+        compact - return the model as a CompactResult instead of a full
+            statsmodels RegressionResults
+        screen - dict of screen_candidates arguments (top, threshold) or a
+            table it already returned for X and y, the search then only
+            visits the retained columns and initial_list. The table is kept
+            on the trace and a "screen" event counts the retained columns
+        trace - SelectionTrace recording every add, drop, threshold change
+            and restart with its timing and fit count
+        missing - "none" returns no selection when y has NaN, "drop" fits on
+            the rows where y is valid. The "gram" engine reads a masked
+            GramMatrix, "qr" and "statsmodels" fit a copy of those rows
+        rows - positions of the rows of X to fit on, repeats allowed, with y
+            holding one value per position. The "gram" engine reads a
+            resampled GramMatrix, so X is not copied, while "qr" and
+            "statsmodels" fit a copy of those rows
     Returns: list of selected features
     Always set threshold_in < threshold_out to avoid infinite looping.
     See https://en.wikipedia.org/wiki/Stepwise_regression for the details
     """
     included = list(initial_list)
-    included_pvals = []
-    included_rvals = []
+    # the features of initial_list count as entered first, with p-value 0
+    included_pvals = [0.0] * len(included)
+    included_rvals = [0.0] * len(included)
     _threshold_in = threshold_in
     threshold_in = 0.1
     lower = False
     rcond = False
     dropped = False
     onetime = True
-    if np.isnan(y).any():
+    trace = SelectionTrace() if trace is None else trace
+
+    def _record(event, **kwargs):
+        trace.record(
+            event,
+            threshold_in=threshold_in,
+            included=len(included),
+            fits=ols.fits if ols is not None else 0,
+            **kwargs,
+        )
+
+    ols = None
+    usable, gram, _X, _y = _search_data(X, y, engine, gram, missing, rows)
+    if not usable:
+        _record("done")
         return [], np.nan, np.nan
+    if screen is not None:
+        if isinstance(screen, pd.DataFrame):
+            screening = screen
+        else:
+            # an engine built for X and y carries the GramMatrix it reads
+            _gram = getattr(engine, "gram", None) if gram is None else gram
+            screening = screen_candidates(_X, _y, gram=_gram, **screen)
+        retained = screening.index[screening["retained"]].union(included, sort=False)
+        trace.screening = screening
+        _record("screen", candidates=retained.size)
+        if verbose:
+            print(f"Screening kept {retained.size} of {X.columns.size} candidates")
+        X, _X = X[retained], _X[retained]
+    ols = _search_engine(_X, _y, engine, gram, cache)
+    ols.reset(included)
+    _record("start", candidates=X.columns.size)
     if verbose:
         print(f"Initial threshold_in value: {threshold_in}")
     while True:
         changed = False
         # forward step
-        excluded = list(set(X.columns) - set(included))
-        new_pval = pd.Series(index=excluded, dtype=float)
-        new_rval = pd.Series(index=excluded, dtype=float)
-        for new_column in excluded:
-            model = sm.OLS(y, sm.add_constant(X[included + [new_column]])).fit()
-            new_pval[new_column] = model.pvalues[new_column]
-            new_rval[new_column] = round(model.rsquared, 3) ** (0.5)
+        excluded = _excluded(X.columns, included)
+        new_pval, new_rsquared = ols.score(excluded)
+        new_rval = new_rsquared.round(3) ** (0.5)
         best_pval = new_pval.min()
         if best_pval < threshold_in:
             _ix = new_pval.argmin()
             best_feature = new_pval.index[_ix]
             included.append(best_feature)
+            ols.add(best_feature)
             included_pvals.append(best_pval)
             included_rvals.append(new_rval[_ix])
             changed = True
+            _record(
+                "add", feature=best_feature, value=best_pval, candidates=len(excluded)
+            )
             if verbose:
                 print("Add  {:30} with p-value {:.6}".format(best_feature, best_pval))
         # backward step
-        model = sm.OLS(y, sm.add_constant(X[included])).fit()
-        # use all coefs except intercept
-        pvalues = model.pvalues.iloc[1:]
+        model_vars = list(included)
+        rsquared = ols.rsquared
+        pvalues = ols.pvalues()
         worst_pval = pvalues.max()  # null if pvalues is empty
         if worst_pval > threshold_out:
             changed = True
@@ -72,6 +191,13 @@ def stepwise_selection(
             included_pvals.pop(_idx)
             included_rvals.pop(_idx)
             included.remove(worst_feature)
+            ols.drop(worst_feature)
+            _record(
+                "drop",
+                feature=worst_feature,
+                value=worst_pval,
+                candidates=len(excluded),
+            )
             if verbose:
                 print("Drop {:30} with p-value {:.6}".format(worst_feature, worst_pval))
 
@@ -129,19 +255,24 @@ def stepwise_selection(
                 else:
                     continue  # pragma: no cover
                 break
+            _record("threshold", value=threshold_in)
             mfalse = np.where(mask == False)[0]
             if rcond:
                 mfalse = mfalse[mfalse > 3]
             if mfalse.size != 0:
                 included = included[: mfalse[0]]
-                model = sm.OLS(y, sm.add_constant(X[included])).fit()
+                model_vars = included
+                _record("truncate")
             break
         elif dropped:
             if threshold_in == 0.1 and onetime:
                 threshold_in = _threshold_in
                 if verbose:
                     print(f"Dropped initial threshold_in value to {threshold_in}")
+                _record("threshold", value=threshold_in)
                 included = []
+                ols.reset()
+                _record("restart")
                 included_pvals = []
                 included_rvals = []
                 changed = True
@@ -151,13 +282,16 @@ def stepwise_selection(
                 threshold_in = np.round(max([0.01, threshold_in - 0.01]), decimals=2)
                 if verbose:
                     print(f"Upped threshold_in value to {threshold_in}")
+                _record("threshold", value=threshold_in)
                 included = []
+                ols.reset()
+                _record("restart")
                 included_pvals = []
                 included_rvals = []
                 changed = True
 
             elif len(included) >= min_vars and lower:
-                if round(model.rsquared, 3) ** (0.5) > 0.9:
+                if round(rsquared, 3) ** (0.5) > 0.9:
                     changed = False
                     if verbose:
                         print("Breaking condition met: R value over 0.9")
@@ -167,10 +301,166 @@ def stepwise_selection(
                 threshold_in = np.round(min([0.1, threshold_in + 0.01]), decimals=2)
                 if verbose:
                     print(f"Dropped threshold_in value to {threshold_in}")
+                _record("threshold", value=threshold_in)
                 included = []
+                ols.reset()
+                _record("restart")
                 included_pvals = []
                 included_rvals = []
                 lower = True
             else:
                 break  # pragma: no cover
+    _record("done")
+    model = _final_model(X, y, model_vars, compact, rows)
     return included, model, threshold_in
+
+
+def criterion_selection(
+    X,
+    y,
+    criterion="bic",
+    initial_list=[],
+    verbose=True,
+    max_vars=12,
+    min_vars=0,
+    engine="qr",
+    gram=None,
+    cache=None,
+    compact=False,
+    trace=None,
+    missing="none",
+    rows=None,
+):
+    """Perform a forward-backward feature selection on an information criterion
+    Arguments:
+        X - pandas.DataFrame with candidate features
+        y - list-like with the target
+        criterion - "aic", "bic" or "adjr2", the value minimised
+        initial_list - list of features to start with (column names of X)
+        verbose - whether to print the sequence of inclusions and exclusions
+        max_vars, min_vars - bounds on the number of selected features,
+            features are added regardless of the criterion below min_vars
+        engine, gram, cache, compact, trace, missing, rows - as in
+            stepwise_selection
+    Returns: (included, model, value) with the criterion of the final model
+    Each step adds the candidate or drops the included feature that lowers
+    the criterion most, until neither does. The criteria are computed from
+    the residual sums of squares the engine keeps, so a step costs no more
+    than a p-value step. Pass the same cache to runs with other criteria on
+    the same X and y to reuse the subsets they share.
+    """
+    included = list(initial_list)
+    trace = SelectionTrace() if trace is None else trace
+    score = CRITERIA[criterion]
+
+    def _record(event, **kwargs):
+        trace.record(event, included=len(included), fits=ols.fits, **kwargs)
+
+    ols = None
+    usable, gram, _X, _y = _search_data(X, y, engine, gram, missing, rows)
+    if not usable:
+        trace.record("done")
+        return [], np.nan, np.nan
+    ols = _search_engine(_X, _y, engine, gram, cache)
+    ols.reset()
+    tss = ols.rss
+    nobs = np.isfinite(np.asarray(y, dtype=float)).sum()
+    ols.reset(included)
+    current = score(ols.rss, nobs, len(included))
+    _record("start", value=current, candidates=X.columns.size)
+    while True:
+        changed = False
+        # forward step
+        excluded = list(set(X.columns) - set(included))
+        if excluded and len(included) < max_vars:
+            new_pval, new_rsquared = ols.score(excluded)
+            values = score(tss * (1 - new_rsquared), nobs, len(included) + 1)
+            values[new_pval.isna()] = np.inf
+            best_feature = values.idxmin()
+            if values[best_feature] < current or len(included) < min_vars:
+                current = values[best_feature]
+                included.append(best_feature)
+                ols.add(best_feature)
+                changed = True
+                _record(
+                    "add", feature=best_feature, value=current, candidates=len(excluded)
+                )
+                if verbose:
+                    print(f"Add  {best_feature:30} with {criterion} {current:.6}")
+        # backward step
+        if len(included) > min_vars:
+            values = score(ols.drop_rss(), nobs, len(included) - 1)
+            worst_feature = values.idxmin()
+            if values[worst_feature] < current:
+                current = values[worst_feature]
+                included.remove(worst_feature)
+                ols.drop(worst_feature)
+                changed = True
+                _record("drop", feature=worst_feature, value=current)
+                if verbose:
+                    print(f"Drop {worst_feature:30} with {criterion} {current:.6}")
+        if not changed:
+            break
+    _record("done", value=current)
+    return included, _final_model(X, y, included, compact, rows), current
+
+
+def stepwise_selection_multi(X, Y, gram=None, **kwargs):
+    """Perform stepwise_selection for every target in Y against the same X
+    Arguments:
+        X - pandas.DataFrame with candidate features
+        Y - pandas.DataFrame with one target per column
+        gram - GramMatrix of X, built once here if not given
+        kwargs - passed to stepwise_selection. engine is not accepted as
+            every target gets its own GramOLS, nor a cache instance as every
+            target gets its own SubsetCache (cache=False disables them)
+    Returns: dict of (included, model, threshold_in) per column of Y
+    The predictor cross-products are shared by all targets and X'Y is
+    computed in a single matrix product, so each search works on the Gram
+    matrix alone. The first forward step, every column fitted alone, is
+    scored for all targets at once and seeds their caches. With
+    missing="drop" the targets sharing the same rows of valid values share
+    one masked GramMatrix.
+    """
+    if "engine" in kwargs:
+        raise TypeError("stepwise_selection_multi does not accept engine")
+    if kwargs.get("cache") not in (None, False):
+        raise TypeError("stepwise_selection_multi cannot share a cache between targets")
+    Y = pd.DataFrame(Y)
+    gram = GramMatrix(X) if gram is None else gram
+    valid = Y.notna().to_numpy()
+    if kwargs.get("missing", "none") != "drop":
+        valid[:] = True
+    # the shared first step only applies to a search starting from nothing
+    seed = (
+        kwargs.get("cache") is None
+        and not list(kwargs.get("initial_list", []))
+        and kwargs.get("screen") is None
+    )
+    columns = _excluded(X.columns, [])
+    results = {}
+    for mask in np.unique(valid, axis=1).T:
+        targets = Y.columns[(valid == mask[:, None]).all(axis=0)]
+        _gram = gram if mask.all() else gram.masked(mask)
+        XY = _gram.crossprod(Y[targets].to_numpy(dtype=float))
+        if seed:
+            centred = [_gram.centre(Y[target]) for target in targets]
+            tss = np.array([_y @ _y for _y in centred])
+            pvalues, rsquared = score_alone(_gram, XY, tss, columns)
+        for i, target in enumerate(targets):
+            y = Y[target]
+            cache = kwargs.get("cache")
+            if seed:
+                cache = SubsetCache()
+                score = (
+                    pvalues.iloc[:, i].rename(None),
+                    rsquared.iloc[:, i].rename(None),
+                )
+                cache.store(frozenset(), "score", score)
+            results[target] = stepwise_selection(
+                X,
+                y,
+                engine=GramOLS(X, y, gram=_gram, xy=XY[:, i]),
+                **dict(kwargs, cache=cache),
+            )
+    return {target: results[target] for target in Y.columns}
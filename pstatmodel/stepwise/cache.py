@@ -0,0 +1,130 @@
+from collections import OrderedDict
+from typing import Callable, Sequence, Tuple
+
+import pandas as pd
+
+
+class SubsetCache:
+    """Bounded LRU cache of subset fits keyed by the frozenset of included columns
+
+    Each entry holds the p-values, R squared and residual sum of squares of
+    the subset together with the scores of the columns left out of it and
+    the residual sums of squares with each of its columns dropped. The
+    hit and miss counters count fits and scores served from the cache and
+    computed by the engine. Share one instance only between selections on
+    the same X and y.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: frozenset, field: str, compute: Callable, valid=None):
+        """Return ``field`` of the subset ``key``, computing it on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = {}
+        self._entries.move_to_end(key)
+        if field in entry and (valid is None or valid(entry[field])):
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry[field] = compute()
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry[field]
+
+    def store(self, key: frozenset, field: str, value) -> None:
+        """Set ``field`` of the subset ``key``, e.g. with a score computed
+        for several targets at once"""
+        self._entries.setdefault(key, {})[field] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def info(self) -> dict:
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            maxsize=self.maxsize,
+            currsize=len(self._entries),
+        )
+
+    def clear(self) -> None:
+        self.hits = self.misses = 0
+        self._entries.clear()
+
+
+class CachedOLS:
+    """Wraps an OLS engine so every subset is fitted and scored only once
+
+    add, drop and reset still go to the wrapped engine, which keeps its
+    factorisation in sync, while the statistics of a subset already seen are
+    read back from the cache.
+    """
+
+    def __init__(self, ols, cache: SubsetCache) -> None:
+        self.ols = ols
+        self.cache = cache
+
+    @property
+    def included(self):
+        return self.ols.included
+
+    def fit(self) -> dict:
+        """p-values, R squared and residual sum of squares of the included set"""
+        return self.cache.lookup(
+            frozenset(self.ols.included),
+            "fit",
+            lambda: dict(
+                pvalues=self.ols.pvalues(),
+                rsquared=self.ols.rsquared,
+                rss=self.ols.rss,
+            ),
+        )
+
+    @property
+    def fits(self) -> int:
+        return self.ols.fits
+
+    @property
+    def rsquared(self) -> float:
+        return self.ols.rsquared
+
+    @property
+    def rss(self) -> float:
+        return self.ols.rss
+
+    def reset(self, columns: Sequence[str] = ()) -> None:
+        self.ols.reset(columns)
+
+    def add(self, column: str) -> None:
+        self.ols.add(column)
+
+    def drop(self, column: str) -> None:
+        self.ols.drop(column)
+
+    def pvalues(self) -> pd.Series:
+        return self.fit()["pvalues"].loc[self.ols.included]
+
+    def drop_rss(self) -> pd.Series:
+        return self.cache.lookup(
+            frozenset(self.ols.included), "drop_rss", self.ols.drop_rss
+        ).loc[self.ols.included]
+
+    def score(self, columns: Sequence[str]) -> Tuple[pd.Series, pd.Series]:
+        index = pd.Index(columns)
+        return self.cache.lookup(
+            frozenset(self.ols.included),
+            "score",
+            lambda: self.ols.score(columns),
+            valid=lambda score: score[0].index.equals(index),
+        )
+
+    def test_column(self, column: str) -> Tuple[float, float]:
+        return self.ols.test_column(column)
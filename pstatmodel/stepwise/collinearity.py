@@ -0,0 +1,79 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from pstatmodel.stepwise.gram import GramMatrix
+
+
+def _correlation(X: pd.DataFrame, gram: Optional[GramMatrix]) -> np.ndarray:
+    gram = GramMatrix(X) if gram is None else gram
+    loc = gram.columns.get_indexer(X.columns)
+    return gram.correlation[np.ix_(loc, loc)]
+
+
+def variance_inflation(X: pd.DataFrame, gram: Optional[GramMatrix] = None) -> pd.Series:
+    """Variance inflation factor of every column of X
+    Arguments:
+        X - pandas.DataFrame with candidate features
+        gram - GramMatrix of X, e.g. from ModelVariables.get_statistics,
+            its correlation matrix is used when given
+    Returns: pandas.Series indexed by the columns of X
+    The VIFs are the diagonal of the inverse correlation matrix, taken from a
+    single eigendecomposition instead of one regression per column. Columns
+    in the span of the others, as every column is when X has more columns
+    than rows, get inf and constant columns get NaN.
+    """
+    corr = _correlation(X, gram)
+    constant = np.isnan(np.diag(corr))
+    vif = np.full(corr.shape[0], np.nan)
+    if (~constant).any():
+        eigval, eigvec = np.linalg.eigh(corr[np.ix_(~constant, ~constant)])
+        null = eigval <= np.finfo(float).eps * corr.shape[0] * eigval.max()
+        with np.errstate(divide="ignore"):
+            _vif = (eigvec[:, ~null] ** 2 / eigval[~null]).sum(axis=1)
+        _vif[(eigvec[:, null] ** 2).sum(axis=1) > 1e-8] = np.inf
+        vif[~constant] = _vif
+    return pd.Series(vif, index=X.columns, dtype=float)
+
+
+def collinearity_clusters(
+    X: pd.DataFrame,
+    threshold: float = 0.9,
+    y=None,
+    gram: Optional[GramMatrix] = None,
+) -> pd.DataFrame:
+    """Group the columns of X linked by a high absolute correlation
+    Arguments:
+        X - pandas.DataFrame with candidate features, e.g. the output of
+            ModelVariables.get_datatable()
+        threshold - columns with absolute correlation >= threshold are linked
+        y - list-like with the target, picks the representative of each
+            cluster as the column most correlated with it
+        gram - GramMatrix of X, e.g. from ModelVariables.get_statistics,
+            its correlation matrix is used when given
+    Returns: pandas.DataFrame indexed by the columns of X, sorted by
+        cluster, with the cluster number, its size and whether the column
+        represents it. Without y the first column of a cluster in X does.
+    Clusters are the connected components of the linked columns (single
+    linkage), so keeping only the representatives drops every redundant
+    candidate before selection. Constant columns form their own clusters.
+    """
+    corr = np.abs(_correlation(X, gram))
+    linked = sparse.csr_matrix(np.nan_to_num(corr, nan=0.0) >= threshold)
+    _, cluster = csgraph.connected_components(linked, directed=False)
+    result = pd.DataFrame({"cluster": cluster}, index=X.columns)
+    result["size"] = result.groupby("cluster")["cluster"].transform("size")
+    if y is None:
+        strength = pd.Series(-np.arange(X.columns.size), index=X.columns)
+    else:
+        gram = GramMatrix(X) if gram is None else gram
+        loc = gram.columns.get_indexer(X.columns)
+        strength = pd.Series(np.abs(gram.crossprod(y)[loc]), index=X.columns)
+        strength /= gram.std[loc]
+        strength = strength.fillna(-np.inf)
+    best = strength.groupby(result["cluster"]).idxmax()
+    result["representative"] = result.index.isin(best)
+    return result.sort_values("cluster", kind="stable")
@@ -0,0 +1,357 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+from scipy import linalg, stats
+
+from pstatmodel.stepwise.gram import GramMatrix
+
+
+def _solve(R: np.ndarray, b: np.ndarray, trans: str = "N") -> np.ndarray:
+    if R.size == 0:
+        return np.zeros(b.shape)
+    return linalg.solve_triangular(R, b, trans=trans)
+
+
+def _pvalues(tvalues: np.ndarray, df_resid: int) -> np.ndarray:
+    return 2 * stats.t.sf(np.abs(tvalues), df_resid)
+
+
+class StatsmodelsOLS:
+    """Reference engine, fits a fresh statsmodels.api.OLS for every query"""
+
+    def __init__(self, X: pd.DataFrame, y) -> None:
+        self.X = X
+        self.y = y
+        self.included: List[str] = []
+        self.fits = 0
+        self._fit()
+
+    def _fit(self) -> None:
+        self.fits += 1
+        self.model = sm.OLS(self.y, sm.add_constant(self.X[self.included])).fit()
+
+    @property
+    def rsquared(self) -> float:
+        return self.model.rsquared
+
+    @property
+    def rss(self) -> float:
+        return self.model.ssr
+
+    def reset(self, columns: Sequence[str] = ()) -> None:
+        self.included = list(columns)
+        self._fit()
+
+    def add(self, column: str) -> None:
+        self.included.append(column)
+        self._fit()
+
+    def drop(self, column: str) -> None:
+        self.included.remove(column)
+        self._fit()
+
+    def test_column(self, column: str) -> Tuple[float, float]:
+        self.fits += 1
+        model = sm.OLS(self.y, sm.add_constant(self.X[self.included + [column]])).fit()
+        return model.pvalues[column], model.rsquared
+
+    def score(self, columns: Sequence[str]) -> Tuple[pd.Series, pd.Series]:
+        pvalues = pd.Series(index=columns, dtype=float)
+        rsquared = pd.Series(index=columns, dtype=float)
+        for column in columns:
+            pvalues[column], rsquared[column] = self.test_column(column)
+        return pvalues, rsquared
+
+    def pvalues(self) -> pd.Series:
+        # use all coefs except intercept
+        return self.model.pvalues.iloc[1:]
+
+    def drop_rss(self) -> pd.Series:
+        rss = pd.Series(index=self.included, dtype=float)
+        for column in self.included:
+            self.fits += 1
+            columns = [other for other in self.included if other != column]
+            rss[column] = sm.OLS(self.y, sm.add_constant(self.X[columns])).fit().ssr
+        return rss
+
+
+class _TriangularOLS:
+    """Statistics shared by the engines that keep the triangular factor R
+
+    Both engines work on centred columns, so R'R is the centred cross-product
+    block of the included columns and ``_qy`` holds R^-T X'y. ``fits`` counts
+    the regressions evaluated, one per scored candidate and per pvalues call.
+    """
+
+    _tol: float
+
+    @property
+    def df_resid(self) -> int:
+        return self.nobs - len(self.included) - 1
+
+    @property
+    def rsquared(self) -> float:
+        return 1 - self._rss / self._tss
+
+    @property
+    def rss(self) -> float:
+        return self._rss
+
+    def _collinear(self, vv: np.ndarray, xx: np.ndarray) -> np.ndarray:
+        return vv <= self._tol * xx
+
+    def _update_rss(self) -> None:
+        self._rss = self._tss - self._qy @ self._qy
+
+    def _score(
+        self, columns: Sequence[str], vv: np.ndarray, vy: np.ndarray, xx: np.ndarray
+    ) -> Tuple[pd.Series, pd.Series]:
+        # vv and vy are the residualised cross-products of each candidate
+        self.fits += len(columns)
+        collinear = self._collinear(vv, xx)
+        vv = np.where(collinear, np.nan, vv)
+        rss = self._rss - vy**2 / vv
+        df_resid = self.df_resid - 1
+        tvalues = vy / np.sqrt(vv * rss / df_resid)
+        rsquared = np.where(collinear, self.rsquared, 1 - rss / self._tss)
+        return (
+            pd.Series(_pvalues(tvalues, df_resid), index=columns, dtype=float),
+            pd.Series(rsquared, index=columns, dtype=float),
+        )
+
+    def test_column(self, column: str) -> Tuple[float, float]:
+        """p-value and R squared of ``column`` added to the included set"""
+        pvalues, rsquared = self.score([column])
+        return pvalues.iloc[0], rsquared.iloc[0]
+
+    def params(self) -> pd.Series:
+        return pd.Series(_solve(self._R, self._qy), index=self.included, dtype=float)
+
+    def bse(self) -> pd.Series:
+        Rinv = _solve(self._R, np.eye(len(self.included)))
+        scale = self._rss / self.df_resid
+        return pd.Series(
+            np.sqrt(scale * (Rinv**2).sum(axis=1)), index=self.included, dtype=float
+        )
+
+    def drop_rss(self) -> pd.Series:
+        """Residual sum of squares of the model without each included column"""
+        self.fits += len(self.included)
+        Rinv = _solve(self._R, np.eye(len(self.included)))
+        increase = self.params() ** 2 / (Rinv**2).sum(axis=1)
+        return self._rss + increase
+
+    def pvalues(self) -> pd.Series:
+        self.fits += 1
+        tvalues = self.params() / self.bse()
+        return pd.Series(
+            _pvalues(tvalues.to_numpy(), self.df_resid),
+            index=self.included,
+            dtype=float,
+        )
+
+
+class IncrementalOLS(_TriangularOLS):
+    """OLS engine that keeps a thin QR factorisation of the included columns
+
+    The columns of X and y are centred once, which takes the intercept out of
+    the factorisation. Adding a column appends it to Q and R through a
+    re-orthogonalised Gram-Schmidt step and dropping one re-triangularises R
+    with Givens rotations, so no query refits the model from scratch.
+    """
+
+    def __init__(self, X: pd.DataFrame, y) -> None:
+        self.columns = pd.Index(X.columns)
+        _X = X.to_numpy(dtype=float)
+        _y = np.asarray(y, dtype=float)
+        self.nobs = _y.size
+        self._X = _X - _X.mean(axis=0)
+        self._y = _y - _y.mean()
+        self._tss = self._y @ self._y
+        self._tol = (np.finfo(float).eps * self.nobs) ** 2
+        self.fits = 0
+        self.reset()
+
+    def _column(self, column: str) -> np.ndarray:
+        return self._X[:, self.columns.get_loc(column)]
+
+    def _orthogonalise(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        r = self._Q.T @ x
+        v = x - self._Q @ r
+        # second pass keeps Q orthogonal for nearly collinear columns
+        r2 = self._Q.T @ v
+        return r + r2, v - self._Q @ r2
+
+    def reset(self, columns: Sequence[str] = ()) -> None:
+        self.included: List[str] = []
+        self._Q = np.empty((self.nobs, 0))
+        self._R = np.empty((0, 0))
+        self._qy = np.empty(0)
+        self._rss = self._tss
+        for column in columns:
+            self.add(column)
+
+    def add(self, column: str) -> None:
+        x = self._column(column)
+        r, v = self._orthogonalise(x)
+        rho = np.linalg.norm(v)
+        q = np.zeros_like(v) if self._collinear(rho**2, x @ x) else v / rho
+        k = len(self.included)
+        R = np.zeros((k + 1, k + 1))
+        R[:k, :k] = self._R
+        R[:k, k] = r
+        R[k, k] = rho
+        self._R = R
+        self._Q = np.column_stack([self._Q, q])
+        self._qy = np.append(self._qy, q @ self._y)
+        self._update_rss()
+        self.included.append(column)
+
+    def drop(self, column: str) -> None:
+        idx = self.included.index(column)
+        self._Q, self._R = linalg.qr_delete(self._Q, self._R, idx, 1, "col")
+        self._qy = self._Q.T @ self._y
+        self._update_rss()
+        self.included.pop(idx)
+
+    def score(self, columns: Sequence[str]) -> Tuple[pd.Series, pd.Series]:
+        """p-value and R squared of every column added alone to the included set
+
+        All candidates are residualised against the included columns at once,
+        so by Frisch-Waugh the new coefficient of candidate j is
+        v_j'y / v_j'v_j, with v_j its residualised column.
+        """
+        X = self._X[:, self.columns.get_indexer(columns)]
+        _, V = self._orthogonalise(X)
+        return self._score(
+            columns, (V**2).sum(axis=0), V.T @ self._y, (X**2).sum(axis=0)
+        )
+
+
+class GramOLS(_TriangularOLS):
+    """OLS engine that reads every subset regression from a GramMatrix
+
+    Only X'y is computed from the rows of the table, everything else comes
+    from sub-blocks of the centred cross-products. With a masked GramMatrix
+    the fit only uses its rows and ``y`` may hold NaN on the others. The
+    included block keeps its Cholesky factor, which is extended by one row
+    on add and rebuilt from the cached block on drop. A column in the span of
+    the ones included before it gets a unit pivot decoupled from them, so it
+    reports a zero coefficient with p-value 1 and can be dropped.
+    """
+
+    def __init__(
+        self,
+        X: pd.DataFrame,
+        y,
+        gram: Optional[GramMatrix] = None,
+        xy: Optional[np.ndarray] = None,
+    ) -> None:
+        self.gram = GramMatrix(X) if gram is None else gram
+        _y = self.gram.centre(y)
+        self.nobs = self.gram.nobs
+        self._xy = self.gram.crossprod(y) if xy is None else xy
+        self._tss = _y @ _y
+        self._tol = np.finfo(float).eps * self.nobs
+        self.fits = 0
+        self.reset()
+
+    def reset(self, columns: Sequence[str] = ()) -> None:
+        self.included: List[str] = []
+        self._loc: List[int] = []
+        self._R = np.empty((0, 0))
+        self._qy = np.empty(0)
+        # 0 for the columns in the span of the ones included before them
+        self._free = np.empty(0)
+        self._rss = self._tss
+        for column in columns:
+            self.add(column)
+
+    @property
+    def df_resid(self) -> int:
+        # collinear columns add nothing to the rank of the model
+        return self.nobs - int(self._free.sum()) - 1
+
+    def _block(self, loc) -> np.ndarray:
+        # cross-products with the included columns, none with collinear ones
+        return self.gram.block(self._loc, loc) * self._free[:, None]
+
+    def add(self, column: str) -> None:
+        j = self.gram.columns.get_loc(column)
+        cjj = self.gram.centred[j, j]
+        r = _solve(self._R, self._block([j])[:, 0], trans="T")
+        rho2 = cjj - r @ r
+        k = len(self.included)
+        R = np.zeros((k + 1, k + 1))
+        R[:k, :k] = self._R
+        if self._collinear(rho2, cjj):
+            # a unit pivot with no coupling: coefficient 0, p-value 1
+            R[k, k], qy, free = 1.0, 0.0, 0.0
+        else:
+            R[:k, k] = r
+            R[k, k] = np.sqrt(rho2)
+            qy, free = (self._xy[j] - r @ self._qy) / R[k, k], 1.0
+        self._R = R
+        self._qy = np.append(self._qy, qy)
+        self._free = np.append(self._free, free)
+        self._update_rss()
+        self._loc.append(j)
+        self.included.append(column)
+
+    def drop(self, column: str) -> None:
+        idx = self.included.index(column)
+        if not self._free.all():
+            # a column left out as collinear may be free without this one
+            self.reset(self.included[:idx] + self.included[idx + 1 :])
+            return
+        self._loc.pop(idx)
+        self.included.pop(idx)
+        self._free = np.delete(self._free, idx)
+        block = self.gram.block(self._loc, self._loc)
+        self._R = linalg.cholesky(block) if self._loc else block
+        self._qy = _solve(self._R, self._xy[self._loc], trans="T")
+        self._update_rss()
+
+    def score(self, columns: Sequence[str]) -> Tuple[pd.Series, pd.Series]:
+        """p-value and R squared of every column added alone to the included set
+
+        Same partial regression as IncrementalOLS.score, with the residualised
+        cross-products read from the Gram matrix instead of the rows.
+        """
+        loc = self.gram.columns.get_indexer(columns)
+        W = _solve(self._R, self._block(loc), trans="T")
+        xx = self.gram.centred[loc, loc]
+        return self._score(
+            columns, xx - (W**2).sum(axis=0), self._xy[loc] - W.T @ self._qy, xx
+        )
+
+
+def score_alone(
+    gram: GramMatrix, xy: np.ndarray, tss: np.ndarray, columns: Sequence[str]
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """p-value and R squared of every column fitted alone to each target
+
+    ``xy`` holds the cross-products of the columns of ``gram`` with the
+    targets, one per column, and ``tss`` their total sums of squares. This
+    is GramOLS.score on an empty included set for all targets at once, the
+    first forward step every search of stepwise_selection_multi shares.
+    """
+    loc = gram.columns.get_indexer(columns)
+    xx = gram.centred[loc, loc][:, None]
+    vy = xy[loc]
+    collinear = xx <= np.finfo(float).eps * gram.nobs * xx
+    vv = np.where(collinear, np.nan, xx)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rss = tss - vy**2 / vv
+        tvalues = vy / np.sqrt(vv * rss / (gram.nobs - 2))
+        rsquared = np.where(collinear, 1 - tss / tss, 1 - rss / tss)
+    pvalues = _pvalues(tvalues, gram.nobs - 2)
+    return (
+        pd.DataFrame(pvalues, index=columns, dtype=float),
+        pd.DataFrame(rsquared, index=columns, dtype=float),
+    )
+
+
+ENGINES = dict(qr=IncrementalOLS, gram=GramOLS, statsmodels=StatsmodelsOLS)
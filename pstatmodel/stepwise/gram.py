@@ -0,0 +1,239 @@
+from functools import cached_property
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# columns weighted at a time by a resampled GramMatrix, bounds its temporary
+_BLOCK = 256
+
+
+class GramMatrix:
+    """Cross-products of a predictor table, computed once and shared
+
+    Holds X'X, the column sums X'1 and the centred cross-products of the
+    columns of X, so every subset regression against any target reads a small
+    sub-block instead of going back to the rows of the table. The
+    covariance, standard deviations and correlation matrix are derived from
+    them on first access. A GramMatrix
+    restricted to some rows of the same table comes from ``masked``, one
+    drawn from them with repetition from ``resampled``, one
+    with new rows added from ``append`` and one without its first rows from
+    ``drop_head``.
+    """
+
+    mask: Optional[np.ndarray] = None
+    rows: Optional[np.ndarray] = None
+    _base: Optional["GramMatrix"] = None
+
+    def __init__(self, X: pd.DataFrame) -> None:
+        self.columns = pd.Index(X.columns)
+        _X = X.to_numpy(dtype=float)
+        self.nobs = _X.shape[0]
+        self.sums = _X.sum(axis=0)
+        self.means = self.sums / self.nobs
+        self.XtX = _X.T @ _X
+        # any per-column offset works for crossprod, the means keep it stable
+        self._offset = self.means
+        self._centred_X = _X - self._offset
+        self.centred = self._centred_X.T @ self._centred_X
+
+    @classmethod
+    def from_variables(cls, variables, index=None) -> "GramMatrix":
+        """GramMatrix of the datatable of a shifted ModelVariables
+
+        The one kept by ``variables.get_statistics`` for the rows in
+        ``index``, so it is computed once per shift.
+        """
+        return variables.get_statistics(index)
+
+    @cached_property
+    def covariance(self) -> np.ndarray:
+        return self.centred / (self.nobs - 1)
+
+    @cached_property
+    def std(self) -> np.ndarray:
+        return np.sqrt(np.diag(self.covariance))
+
+    @cached_property
+    def correlation(self) -> np.ndarray:
+        """Correlation matrix of the columns, NaN for the constant ones"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = self.covariance / np.outer(self.std, self.std)
+        corr[self.std == 0, :] = np.nan
+        corr[:, self.std == 0] = np.nan
+        return corr
+
+    def _weighted(self, weights: np.ndarray, nobs: int) -> "GramMatrix":
+        # cross-products of the stored rows, each counted ``weights`` times
+        gram = object.__new__(type(self))
+        gram.columns = self.columns
+        gram.nobs = nobs
+        sums = weights @ self._centred_X
+        gram.sums = sums + nobs * self._offset
+        gram.means = gram.sums / nobs
+        shift = sums / nobs
+        weighted = np.empty((self.columns.size, self.columns.size))
+        # a block of columns at a time, so no weighted copy of the table
+        for start in range(0, self.columns.size, _BLOCK):
+            block = slice(start, start + _BLOCK)
+            weighted[:, block] = self._centred_X.T @ (
+                self._centred_X[:, block] * weights[:, None]
+            )
+        gram.centred = weighted - nobs * np.outer(shift, shift)
+        gram.XtX = (
+            weighted
+            + np.outer(sums, self._offset)
+            + np.outer(self._offset, sums)
+            + nobs * np.outer(self._offset, self._offset)
+        )
+        gram._offset = self._offset
+        gram._centred_X = self._centred_X
+        gram._base = self
+        return gram
+
+    def masked(self, mask) -> "GramMatrix":
+        """GramMatrix of the rows of the table where ``mask`` is True
+
+        The rows left out are downdated from the cross-products of the whole
+        table, so X is never copied and every mask costs only its missing
+        rows. On a resampled GramMatrix ``mask`` covers its positions, which
+        are dropped from the sample.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        if self.rows is not None:
+            weights = np.bincount(self.rows[mask], minlength=self._base.nobs)
+            gram = self._base._weighted(weights.astype(float), int(mask.sum()))
+            gram.rows = self.rows
+            gram.mask = mask
+            return gram
+        base = self if self._base is None else self._base
+        dropped = base._centred_X[~mask]
+        raw = dropped + base._offset
+        gram = object.__new__(type(self))
+        gram.columns = base.columns
+        gram.nobs = int(mask.sum())
+        gram.sums = base.sums - raw.sum(axis=0)
+        gram.means = gram.sums / gram.nobs
+        gram.XtX = base.XtX - raw.T @ raw
+        # cross-products around the offset, less the dropped rows, re-centred
+        offset = base.means - base._offset
+        shift = gram.means - base._offset
+        gram.centred = (
+            base.centred
+            + base.nobs * np.outer(offset, offset)
+            - dropped.T @ dropped
+            - gram.nobs * np.outer(shift, shift)
+        )
+        gram._offset = base._offset
+        gram._centred_X = base._centred_X
+        gram.mask = mask
+        gram._base = base
+        return gram
+
+    def resampled(self, rows) -> "GramMatrix":
+        """GramMatrix of the rows of the table at positions ``rows``
+
+        Positions may repeat, as in a bootstrap sample. The cross-products
+        are weighted by how often each stored row is drawn and crossprod
+        adds up the target over the positions of each row, so only the
+        positions are kept and no table is built for the sample; targets
+        passed to it hold one value per position.
+        """
+        if self._base is not None:
+            raise ValueError("resample the unmasked GramMatrix")
+        rows = np.asarray(rows)
+        weights = np.bincount(rows, minlength=self.nobs).astype(float)
+        gram = self._weighted(weights, rows.size)
+        gram.rows = rows
+        return gram
+
+    def append(self, X: pd.DataFrame) -> "GramMatrix":
+        """GramMatrix of the table with the rows of ``X`` added at the end
+
+        The cross-products are updated with the new rows only, merging their
+        centred cross-products with the stored ones.
+        """
+        if self._base is not None:
+            raise ValueError("append to the unmasked GramMatrix")
+        if X.shape[0] == 0:
+            return self
+        _X = X[self.columns].to_numpy(dtype=float)
+        gram = object.__new__(type(self))
+        gram.columns = self.columns
+        gram.nobs = self.nobs + _X.shape[0]
+        gram.sums = self.sums + _X.sum(axis=0)
+        gram.means = gram.sums / gram.nobs
+        gram.XtX = self.XtX + _X.T @ _X
+        new_means = _X.mean(axis=0)
+        new_centred = _X - new_means
+        delta = new_means - self.means
+        gram.centred = (
+            self.centred
+            + new_centred.T @ new_centred
+            + self.nobs * _X.shape[0] / gram.nobs * np.outer(delta, delta)
+        )
+        gram._offset = self._offset
+        gram._centred_X = np.vstack([self._centred_X, _X - self._offset])
+        return gram
+
+    def drop_head(self, count: int) -> "GramMatrix":
+        """GramMatrix of the table without its first ``count`` rows
+
+        The inverse of ``append``: the centred cross-products of the leading
+        rows are split off the stored ones, so a window sliding over the
+        table costs only the rows entering and leaving it.
+        """
+        if self._base is not None:
+            raise ValueError("drop rows from the unmasked GramMatrix")
+        if count == 0:
+            return self
+        dropped = self._centred_X[:count]
+        raw = dropped + self._offset
+        gram = object.__new__(type(self))
+        gram.columns = self.columns
+        gram.nobs = self.nobs - count
+        gram.sums = self.sums - raw.sum(axis=0)
+        gram.means = gram.sums / gram.nobs
+        gram.XtX = self.XtX - raw.T @ raw
+        old_means = raw.mean(axis=0)
+        old_centred = raw - old_means
+        delta = old_means - gram.means
+        gram.centred = (
+            self.centred
+            - old_centred.T @ old_centred
+            - gram.nobs * count / self.nobs * np.outer(delta, delta)
+        )
+        gram._offset = self._offset
+        gram._centred_X = self._centred_X[count:]
+        return gram
+
+    def centre(self, y) -> np.ndarray:
+        """``y`` minus its mean over the rows in use, zero on the masked rows"""
+        _y = np.asarray(y, dtype=float)
+        if self.mask is None:
+            return _y - _y.mean(axis=0)
+        mask = self.mask if _y.ndim == 1 else self.mask[:, None]
+        return np.where(mask, _y - _y[self.mask].mean(axis=0), 0.0)
+
+    def crossprod(self, y) -> np.ndarray:
+        """Centred cross-products of every column with ``y``
+
+        A 2-D ``y`` holding several targets as columns is handled in a single
+        matrix product. On a masked GramMatrix ``y`` spans every row of the
+        table and its masked rows are ignored, on a resampled one it holds
+        one value per position.
+        """
+        _y = self.centre(y)
+        if self.rows is None:
+            return self._centred_X.T @ _y
+        # add up the target over the positions drawing each stored row
+        if _y.ndim == 1:
+            drawn = np.bincount(self.rows, weights=_y, minlength=self._base.nobs)
+        else:
+            drawn = np.zeros((self._base.nobs, _y.shape[1]))
+            np.add.at(drawn, self.rows, _y)
+        return self._centred_X.T @ drawn
+
+    def block(self, rows: Sequence[int], cols: Sequence[int]) -> np.ndarray:
+        return self.centred[np.ix_(rows, cols)]
@@ -0,0 +1,150 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from pstatmodel.stepwise.base import stepwise_selection
+from pstatmodel.stepwise.gram import GramMatrix
+
+# predictor tables attached by each worker, keyed like the predictors mapping
+_SHARED: dict = {}
+
+
+def _share(
+    predictors: Dict[str, pd.DataFrame]
+) -> Tuple[List[shared_memory.SharedMemory], dict]:
+    blocks, specs = [], {}
+    for key, table in predictors.items():
+        values = table.to_numpy(dtype=float)
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=float, buffer=shm.buf)[:] = values
+        blocks.append(shm)
+        specs[key] = (shm.name, values.shape, table.columns, table.index)
+    return blocks, specs
+
+
+def _attach(specs: dict) -> None:
+    for key, (name, shape, columns, index) in specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        values = np.ndarray(shape, dtype=float, buffer=shm.buf)
+        table = pd.DataFrame(values, index=index, columns=columns, copy=False)
+        _SHARED[key] = dict(shm=shm, table=table, gram=None)
+
+
+def _run_job(init_month: str, target, thresholds: dict, rows=None):
+    shared = _SHARED[init_month]
+    if "engine" in thresholds:
+        if rows is not None:
+            return stepwise_selection(shared["table"].iloc[rows], target, **thresholds)
+        return stepwise_selection(shared["table"], target, **thresholds)
+    if shared["gram"] is None:
+        shared["gram"] = GramMatrix(shared["table"])
+    return stepwise_selection(
+        shared["table"], target, gram=shared["gram"], rows=rows, **thresholds
+    )
+
+
+def _run_windows(key: str, target, thresholds: dict, windows):
+    table = _SHARED[key]["table"]
+    gram, results, previous = None, [], None
+    for start, stop in windows:
+        if gram is None:
+            gram = GramMatrix(table.iloc[start:stop])
+        else:
+            gram = gram.append(table.iloc[previous[1] : stop])
+            gram = gram.drop_head(start - previous[0])
+        previous = (start, stop)
+        options = thresholds if "engine" in thresholds else dict(thresholds, gram=gram)
+        results.append(
+            stepwise_selection(table.iloc[start:stop], target[start:stop], **options)
+        )
+    return results
+
+
+@contextmanager
+def _shared_pool(predictors: Dict[str, pd.DataFrame], max_workers: Optional[int]):
+    blocks, specs = _share(predictors)
+    try:
+        with ProcessPoolExecutor(
+            max_workers, initializer=_attach, initargs=(specs,)
+        ) as pool:
+            yield pool
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+
+def run_stepwise_jobs(
+    predictors: Dict[str, pd.DataFrame],
+    jobs: Iterable[tuple],
+    max_workers: Optional[int] = None,
+) -> Iterator[Tuple[int, tuple]]:
+    """Spread stepwise_selection calls over a process pool
+
+    Each job is a ``(target, init_month, thresholds)`` tuple, where ``target``
+    holds the values of y, ``init_month`` is the key of its predictor table in
+    ``predictors`` and ``thresholds`` are keyword arguments for
+    stepwise_selection. A job may carry a fourth element with the row
+    positions of the table to fit on, repeats allowed, with ``target``
+    holding one value per position, which lets resampling runs share one
+    table. The predictor tables are copied once into shared memory and every
+    worker reads them from there, building one GramMatrix per table that is
+    reused by all of its jobs, resampled for the ones with rows.
+
+    Yields ``(job_index, (included, model, threshold_in))`` as jobs finish.
+    """
+    with _shared_pool(predictors, max_workers) as pool:
+        futures = {
+            pool.submit(
+                _run_job,
+                init_month,
+                np.asarray(target, dtype=float),
+                {"verbose": False, **(thresholds or {})},
+                *rows,
+            ): idx
+            for idx, (target, init_month, thresholds, *rows) in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def run_window_jobs(
+    X: pd.DataFrame,
+    y,
+    windows: Sequence[Tuple[int, int]],
+    thresholds: Optional[dict] = None,
+    max_workers: Optional[int] = None,
+) -> Iterator[Tuple[int, tuple]]:
+    """Run stepwise_selection on row windows of one table over a process pool
+
+    ``windows`` holds ``(start, stop)`` row positions, ordered so that both
+    ends never move backwards, as in rolling or expanding windows. They are
+    split into one contiguous chunk per worker; each worker builds the
+    GramMatrix of its first window and slides it along the chunk with
+    ``append`` and ``drop_head``, so only the rows entering and leaving a
+    window are processed.
+
+    Yields ``(window_index, (included, model, threshold_in))`` as chunks
+    finish.
+    """
+    windows = list(windows)
+    target = np.asarray(y, dtype=float)
+    thresholds = {"verbose": False, **(thresholds or {})}
+    workers = max_workers or os.cpu_count() or 1
+    chunks = np.array_split(np.arange(len(windows)), max(min(workers, len(windows)), 1))
+    with _shared_pool({"X": X}, max_workers) as pool:
+        futures = {
+            pool.submit(
+                _run_windows, "X", target, thresholds, [windows[i] for i in chunk]
+            ): chunk
+            for chunk in chunks
+            if chunk.size
+        }
+        for future in as_completed(futures):
+            for idx, result in zip(futures[future], future.result()):
+                yield int(idx), result
@@ -0,0 +1,81 @@
+import itertools
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from pstatmodel.stepwise.base import stepwise_selection
+from pstatmodel.stepwise.cache import CachedOLS, SubsetCache
+from pstatmodel.stepwise.engine import ENGINES, GramOLS
+
+
+class SelectionPath:
+    """stepwise_selection of one target under many thresholds, sharing fits
+
+    A convenience over the ``cache`` argument of stepwise_selection: one
+    engine and one SubsetCache are kept for X and y, so ``select`` and
+    ``grid`` run the full search for each threshold_in, threshold_out,
+    min_vars and max_vars while only fitting the subsets no earlier run has
+    reached.
+    """
+
+    def __init__(
+        self, X: pd.DataFrame, y, engine="qr", gram=None, maxsize: int = 65536
+    ) -> None:
+        self.X = X
+        self.y = y
+        ols = GramOLS(X, y, gram=gram) if gram is not None else ENGINES[engine](X, y)
+        self.cache = SubsetCache(maxsize=maxsize)
+        self.ols = CachedOLS(ols, self.cache)
+
+    def select(
+        self,
+        threshold_in: float = 0.05,
+        threshold_out: float = 0.1,
+        min_vars: int = 4,
+        max_vars: int = 12,
+        **kwargs,
+    ):
+        """stepwise_selection on the shared engine and cache"""
+        return stepwise_selection(
+            self.X,
+            self.y,
+            threshold_in=threshold_in,
+            threshold_out=threshold_out,
+            min_vars=min_vars,
+            max_vars=max_vars,
+            engine=self.ols,
+            cache=False,
+            verbose=kwargs.pop("verbose", False),
+            **kwargs,
+        )
+
+    def grid(
+        self,
+        threshold_in: Sequence[float] = (0.05,),
+        threshold_out: Sequence[float] = (0.1,),
+        min_vars: Sequence[int] = (4,),
+        max_vars: Sequence[int] = (12,),
+        **kwargs,
+    ) -> pd.DataFrame:
+        """Results of select for every combination of the given values"""
+        kwargs.setdefault("compact", True)
+        rows = []
+        for combination in itertools.product(
+            threshold_in, threshold_out, min_vars, max_vars
+        ):
+            included, model, threshold = self.select(*combination, **kwargs)
+            rsquared = getattr(model, "rsquared", np.nan)
+            rows.append((*combination, included, threshold, rsquared))
+        return pd.DataFrame(
+            rows,
+            columns=[
+                "threshold_in",
+                "threshold_out",
+                "min_vars",
+                "max_vars",
+                "included",
+                "final_threshold_in",
+                "rsquared",
+            ],
+        )
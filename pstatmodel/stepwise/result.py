@@ -0,0 +1,121 @@
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+from scipy import linalg, stats
+
+
+class CompactResult:
+    """Array-backed summary of an OLS fit with an intercept
+
+    Keeps only the coefficients, standard errors, p-values, R squared, nobs
+    and the selected names, all indexed like statsmodels with "const" first.
+    The selected columns and the target on the fitted rows are kept so the
+    full statsmodels RegressionResults can be rebuilt on demand; pickling
+    drops them, so a result sent between processes carries only its
+    statistics. Rows where the target is NaN are left out of the fit.
+    """
+
+    __slots__ = (
+        "names",
+        "_params",
+        "_bse",
+        "_pvalues",
+        "rsquared",
+        "nobs",
+        "_data",
+        "_model",
+    )
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        params: np.ndarray,
+        bse: np.ndarray,
+        pvalues: np.ndarray,
+        rsquared: float,
+        nobs: int,
+        data=None,
+    ) -> None:
+        self.names = tuple(names)
+        self._params = params
+        self._bse = bse
+        self._pvalues = pvalues
+        self.rsquared = rsquared
+        self.nobs = nobs
+        self._data = data
+        self._model = None
+
+    @classmethod
+    def fit(
+        cls, X: pd.DataFrame, y, columns: Sequence[str], rows=None
+    ) -> "CompactResult":
+        _y = np.asarray(y, dtype=float)
+        valid = ~np.isnan(_y)
+        _y = _y[valid]
+        nobs = _y.size
+        table = X[list(columns)]
+        if rows is not None:
+            table = table.iloc[rows]
+        # only the selected columns on the fitted rows are kept for ``model``
+        table = table[valid]
+        y = y[valid] if isinstance(y, pd.Series) else _y
+        Z = np.column_stack([np.ones(nobs), table.to_numpy(dtype=float)])
+        Q, R = np.linalg.qr(Z)
+        params = linalg.solve_triangular(R, Q.T @ _y)
+        resid = _y - Z @ params
+        df_resid = nobs - Z.shape[1]
+        Rinv = linalg.solve_triangular(R, np.eye(Z.shape[1]))
+        bse = np.sqrt((resid @ resid) / df_resid * (Rinv**2).sum(axis=1))
+        pvalues = 2 * stats.t.sf(np.abs(params / bse), df_resid)
+        rsquared = 1 - (resid @ resid) / ((_y - _y.mean()) ** 2).sum()
+        return cls(columns, params, bse, pvalues, rsquared, nobs, data=(table, y))
+
+    def __reduce__(self):
+        # the data only serves to rebuild ``model``, it is not pickled
+        return (
+            type(self),
+            (
+                self.names,
+                self._params,
+                self._bse,
+                self._pvalues,
+                self.rsquared,
+                self.nobs,
+            ),
+        )
+
+    def _series(self, values: np.ndarray) -> pd.Series:
+        return pd.Series(values, index=["const", *self.names], dtype=float)
+
+    @property
+    def params(self) -> pd.Series:
+        return self._series(self._params)
+
+    @property
+    def bse(self) -> pd.Series:
+        return self._series(self._bse)
+
+    @property
+    def pvalues(self) -> pd.Series:
+        return self._series(self._pvalues)
+
+    @property
+    def model(self):
+        """Full statsmodels RegressionResults, fitted on first access"""
+        if self._model is None:
+            if self._data is None:
+                raise ValueError("CompactResult was built without its data")
+            X, y = self._data
+            self._model = sm.OLS(y, sm.add_constant(X)).fit()
+        return self._model
+
+    def summary(self):
+        return self.model.summary()
+
+    def __repr__(self) -> str:
+        return (
+            f"CompactResult(names={list(self.names)}, "
+            f"rsquared={self.rsquared:.3f}, nobs={self.nobs})"
+        )
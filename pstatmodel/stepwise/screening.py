@@ -0,0 +1,56 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from pstatmodel.stepwise.gram import GramMatrix
+
+
+def screen_candidates(
+    X: pd.DataFrame,
+    y,
+    top: Optional[int] = None,
+    threshold: Optional[float] = None,
+    gram: Optional[GramMatrix] = None,
+) -> pd.DataFrame:
+    """Rank the columns of X by their absolute correlation with y
+    Arguments:
+        X - pandas.DataFrame with candidate features
+        y - list-like with the target
+        top - keep the ``top`` best ranked columns
+        threshold - keep the columns with absolute correlation >= threshold
+        gram - GramMatrix of X, e.g. from ModelVariables.get_statistics,
+            its cross-products are used when given
+    Returns: pandas.DataFrame indexed by the columns of X, sorted by rank,
+        with the correlation, the rank and whether the column is retained.
+        Without top and threshold every column is retained.
+    All correlations come from a single matrix product (sure independence
+    screening) over the rows where y is valid; constant columns get a NaN
+    correlation and are dropped.
+    """
+    if gram is not None:
+        _y = gram.centre(y)
+        loc = gram.columns.get_indexer(X.columns)
+        xy = gram.crossprod(y)[loc]
+        xx = np.diag(gram.centred)[loc]
+    else:
+        _y = np.asarray(y, dtype=float)
+        valid = ~np.isnan(_y)
+        _y = _y[valid] - _y[valid].mean()
+        _X = X.to_numpy(dtype=float)[valid]
+        _X = _X - _X.mean(axis=0)
+        xy = _X.T @ _y
+        xx = (_X**2).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = xy / np.sqrt(xx * (_y @ _y))
+    corr[xx == 0] = np.nan
+
+    result = pd.DataFrame({"correlation": corr}, index=X.columns)
+    result["rank"] = result["correlation"].abs().rank(ascending=False, method="first")
+    retained = result["correlation"].notna()
+    if top is not None:
+        retained &= result["rank"] <= top
+    if threshold is not None:
+        retained &= result["correlation"].abs() >= threshold
+    result["retained"] = retained
+    return result.sort_values("rank", na_position="last")
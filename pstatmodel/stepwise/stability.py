@@ -0,0 +1,47 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from pstatmodel.stepwise.parallel import run_stepwise_jobs
+
+
+def stability_selection(
+    X: pd.DataFrame,
+    y,
+    resamples: int = 1000,
+    fraction: float = 1.0,
+    replace: bool = True,
+    random_state=None,
+    max_workers: Optional[int] = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """Selection frequency of every feature of X under resampling of the years
+    Arguments:
+        X - pandas.DataFrame with candidate features, one row per year
+        y - list-like with the target
+        resamples - number of row samples drawn
+        fraction - size of each sample relative to the years where y is valid
+        replace - draw with replacement (bootstrap) or without (subsampling)
+        random_state - seed or numpy Generator for the samples
+        max_workers - size of the process pool running the selections
+        kwargs - passed to stepwise_selection
+    Returns: pandas.DataFrame indexed by the columns of X, sorted by
+        frequency, with how many samples selected each feature and the
+        fraction of samples that did
+    The samples are arrays of row positions drawn among the years where y is
+    valid. Every worker shares one GramMatrix of X and reads each sample
+    from it through GramMatrix.resampled, so X is never copied.
+    """
+    _y = np.asarray(y, dtype=float)
+    rng = np.random.default_rng(random_state)
+    valid = np.flatnonzero(~np.isnan(_y))
+    size = int(round(fraction * valid.size))
+    samples = [rng.choice(valid, size, replace=replace) for _ in range(resamples)]
+    thresholds = {"compact": True, **kwargs}
+    jobs = [(_y[rows], "X", thresholds, rows) for rows in samples]
+    count = pd.Series(0, index=X.columns, dtype=int)
+    for _, (included, _, _) in run_stepwise_jobs({"X": X}, jobs, max_workers):
+        count[included] += 1
+    result = pd.DataFrame({"count": count, "frequency": count / resamples})
+    return result.sort_values("frequency", ascending=False, kind="stable")
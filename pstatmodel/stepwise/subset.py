@@ -0,0 +1,186 @@
+from time import perf_counter
+
+import numpy as np
+import statsmodels.api as sm
+from scipy import linalg
+
+from pstatmodel.stepwise.gram import GramMatrix
+from pstatmodel.stepwise.result import CompactResult
+
+CRITERIA = dict(
+    aic=lambda rss, nobs, k: nobs * np.log(rss / nobs) + 2 * (k + 1),
+    bic=lambda rss, nobs, k: nobs * np.log(rss / nobs) + np.log(nobs) * (k + 1),
+    # log residual variance, its minimum is the maximum adjusted R squared
+    adjr2=lambda rss, nobs, k: np.log(rss / (nobs - k - 1)),
+)
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+class _BranchAndBound:
+    """Depth-first leaps-and-bounds search on centred cross-products
+
+    Columns are visited in decreasing order of absolute correlation with y.
+    Each node extends the Cholesky factor of its parent by one column, so its
+    RSS costs O(k^2). A branch is pruned when the RSS of its parent together
+    with every column still available to it, the lowest RSS any subset
+    in the branch can reach, is no better than the incumbent of every size
+    the branch could still produce.
+    """
+
+    def __init__(self, C, xy, tss, nobs, min_vars, max_vars, deadline):
+        self.C = C
+        self.xy = xy
+        self.tss = tss
+        self.nobs = nobs
+        self.min_vars = min_vars
+        self.max_vars = max_vars
+        self.deadline = deadline
+        self.tol = np.finfo(float).eps * nobs
+        self.best = {k: (np.inf, None) for k in range(min_vars, max_vars + 1)}
+        xx = np.diag(C)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = np.abs(xy) / np.sqrt(xx)
+        self.order = np.argsort(-np.nan_to_num(corr, nan=-1.0), kind="stable")
+        self.order = self.order[xx[self.order] > 0]
+
+    def _extend(self, R, qy, subset, j):
+        if R.size == 0:
+            r = np.empty(0)
+        else:
+            r = linalg.solve_triangular(R, self.C[subset, j], trans="T")
+        rho2 = self.C[j, j] - r @ r
+        if rho2 <= self.tol * self.C[j, j]:
+            return None
+        k = len(subset)
+        _R = np.zeros((k + 1, k + 1))
+        _R[:k, :k] = R
+        _R[:k, k] = r
+        _R[k, k] = np.sqrt(rho2)
+        return _R, np.append(qy, (self.xy[j] - r @ qy) / _R[k, k])
+
+    def _offer(self, subset, rss):
+        k = len(subset)
+        if k in self.best and rss < self.best[k][0]:
+            self.best[k] = (rss, list(subset))
+
+    def _lower_bound(self, subset, remaining):
+        cols = list(subset) + list(remaining)
+        if len(cols) >= self.nobs - 1:
+            return 0.0
+        try:
+            R = linalg.cholesky(self.C[np.ix_(cols, cols)])
+        except linalg.LinAlgError:
+            return 0.0
+        qy = linalg.solve_triangular(R, self.xy[cols], trans="T")
+        return self.tss - qy @ qy
+
+    def greedy(self):
+        """Forward pass seeding one incumbent per size"""
+        R, qy, subset = np.empty((0, 0)), np.empty(0), []
+        while len(subset) < self.max_vars:
+            step = None
+            for j in self.order:
+                if j in subset:
+                    continue
+                node = self._extend(R, qy, subset, j)
+                if node is not None and (step is None or node[1] @ node[1] > step[2]):
+                    step = (j, node, node[1] @ node[1])
+            if step is None:
+                break
+            subset = subset + [step[0]]
+            R, qy = step[1]
+            self._offer(subset, self.tss - qy @ qy)
+
+    def search(self, R=None, qy=None, subset=(), start=0):
+        if R is None:
+            R, qy = np.empty((0, 0)), np.empty(0)
+        if self.deadline is not None and perf_counter() > self.deadline:
+            raise _BudgetExceeded
+        self._offer(subset, self.tss - qy @ qy)
+        remaining = self.order[start:]
+        if len(subset) == self.max_vars or remaining.size == 0:
+            return
+        sizes = range(
+            max(len(subset) + 1, self.min_vars),
+            min(self.max_vars, len(subset) + remaining.size) + 1,
+        )
+        bound = self._lower_bound(subset, remaining)
+        if all(bound >= self.best[k][0] for k in sizes):
+            return
+        for pos in range(start, self.order.size):
+            j = self.order[pos]
+            node = self._extend(R, qy, list(subset), j)
+            if node is not None:
+                self.search(*node, subset=(*subset, j), start=pos + 1)
+
+
+def best_subset_selection(
+    X,
+    y,
+    min_vars=4,
+    max_vars=12,
+    criterion="bic",
+    time_budget=None,
+    gram=None,
+    verbose=True,
+    compact=False,
+):
+    """Perform a best-subset selection by branch and bound on the RSS
+    Arguments:
+        X - pandas.DataFrame with candidate features
+        y - list-like with the target
+        min_vars, max_vars - range of subset sizes searched
+        criterion - "aic", "bic" or "adjr2", picks the size among the best
+            subsets
+        time_budget - seconds after which the best subsets found so far are
+            used, None searches until the tree is exhausted
+        gram - GramMatrix of X to share between calls
+        verbose - whether to report an exhausted budget
+        compact - return the model as a CompactResult
+    Returns: (included, model, threshold) like stepwise_selection, where
+        threshold is the largest p-value among the selected features
+    A greedy forward pass seeds the incumbents, so even a tight budget
+    returns subsets at least as good as forward selection.
+    """
+    if np.isnan(y).any():
+        return [], np.nan, np.nan
+    gram = GramMatrix(X) if gram is None else gram
+    loc = gram.columns.get_indexer(X.columns)
+    _y = np.asarray(y, dtype=float)
+    nobs = gram.nobs
+    max_vars = min(max_vars, loc.size, nobs - 2)
+    min_vars = min(min_vars, max_vars)
+    deadline = None if time_budget is None else perf_counter() + time_budget
+    search = _BranchAndBound(
+        gram.centred[np.ix_(loc, loc)],
+        gram.crossprod(_y)[loc],
+        ((_y - _y.mean()) ** 2).sum(),
+        nobs,
+        min_vars,
+        max_vars,
+        deadline,
+    )
+    search.greedy()
+    try:
+        search.search()
+    except _BudgetExceeded:
+        if verbose:
+            print(f"Time budget of {time_budget}s exhausted, using best subsets so far")
+
+    scores = {
+        k: CRITERIA[criterion](rss, nobs, k)
+        for k, (rss, subset) in search.best.items()
+        if subset is not None
+    }
+    if not scores:
+        return [], np.nan, np.nan
+    best_size = min(scores, key=scores.get)
+    included = [X.columns[idx] for idx in search.best[best_size][1]]
+    if compact:
+        model = CompactResult.fit(X, y, included)
+    else:
+        model = sm.OLS(y, sm.add_constant(X[included])).fit()
+    return included, model, model.pvalues.iloc[1:].max()
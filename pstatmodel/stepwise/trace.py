@@ -0,0 +1,58 @@
+import logging
+from dataclasses import asdict, dataclass, field
+from time import perf_counter
+from typing import Callable, List, Optional
+
+import pandas as pd
+
+
+@dataclass
+class TraceEvent:
+    event: str
+    feature: Optional[str] = None
+    value: Optional[float] = None
+    threshold_in: Optional[float] = None
+    included: int = 0
+    candidates: int = 0
+    fits: int = 0
+    elapsed: float = 0.0
+
+
+@dataclass
+class SelectionTrace:
+    """Structured record of what stepwise_selection did and when
+
+    Events are "screen", "start", "add", "drop", "threshold", "restart",
+    "truncate" and "done". Each one carries the wall-time in seconds since
+    the trace was created, the number of OLS fits the engine had performed
+    and the candidate count at that point. Every event is also passed to
+    ``callback`` and logged at DEBUG level on ``logger`` when given. A
+    screened search keeps the screen_candidates table in ``screening``.
+    """
+
+    callback: Optional[Callable[[TraceEvent], None]] = None
+    logger: Optional[logging.Logger] = None
+    events: List[TraceEvent] = field(default_factory=list)
+    screening: Optional[pd.DataFrame] = None
+
+    def __post_init__(self) -> None:
+        self._start = perf_counter()
+
+    def record(self, event: str, **kwargs) -> TraceEvent:
+        _event = TraceEvent(event, elapsed=perf_counter() - self._start, **kwargs)
+        self.events.append(_event)
+        if self.callback is not None:
+            self.callback(_event)
+        if self.logger is not None:
+            self.logger.debug("stepwise %s", _event.event, extra=asdict(_event))
+        return _event
+
+    @property
+    def fits(self) -> int:
+        return self.events[-1].fits if self.events else 0
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [asdict(_event) for _event in self.events],
+            columns=list(TraceEvent.__dataclass_fields__),
+        )
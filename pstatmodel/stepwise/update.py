@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from pstatmodel.stepwise.base import stepwise_selection
+from pstatmodel.stepwise.gram import GramMatrix
+
+
+class SelectionUpdater:
+    """Selection of one target kept current as new years are appended
+
+    A thin wrapper around stepwise_selection: each call to ``append`` adds
+    the new rows to the GramMatrix and reruns the search on it, so the
+    result is always the one a fresh search on the whole table returns.
+    The search depends on the path it takes through the threshold changes,
+    so it is rerun on every append. The rows are kept in buffers that grow
+    geometrically, so an append copies only the new rows.
+    """
+
+    def __init__(self, X: pd.DataFrame, y, **kwargs) -> None:
+        self.kwargs = {"verbose": False, **kwargs}
+        self.columns = X.columns
+        self.gram = GramMatrix(X)
+        self.nobs = X.shape[0]
+        self._values = X.to_numpy(dtype=float, copy=True)
+        self._y = np.array(y, dtype=float)
+        self._index = list(X.index)
+        self._search()
+
+    @property
+    def X(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            self._values[: self.nobs],
+            index=self._index,
+            columns=self.columns,
+            copy=False,
+        )
+
+    @property
+    def y(self) -> pd.Series:
+        return pd.Series(self._y[: self.nobs], index=self._index, copy=False)
+
+    def _search(self) -> None:
+        self.result = stepwise_selection(self.X, self.y, gram=self.gram, **self.kwargs)
+
+    def _grow(self, count: int) -> None:
+        size = self.nobs + count
+        if size <= self._y.size:
+            return
+        capacity = max(2 * self._y.size, size)
+        values = np.empty((capacity, self.columns.size))
+        values[: self.nobs] = self._values[: self.nobs]
+        target = np.empty(capacity)
+        target[: self.nobs] = self._y[: self.nobs]
+        self._values, self._y = values, target
+
+    def append(self, X: pd.DataFrame, y) -> bool:
+        """Add new rows to the table and target, returns True if the
+        selected features or the final threshold_in changed"""
+        count = X.shape[0]
+        self.gram = self.gram.append(X)
+        self._grow(count)
+        stop = self.nobs + count
+        self._values[self.nobs : stop] = X[self.columns].to_numpy(dtype=float)
+        self._y[self.nobs : stop] = np.asarray(y, dtype=float)
+        self._index.extend(X.index)
+        self.nobs = stop
+        included, _, threshold_in = self.result
+        self._search()
+        return not (
+            self.result[0] == included
+            and np.array_equal(self.result[2], threshold_in, equal_nan=True)
+        )
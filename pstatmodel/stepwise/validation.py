@@ -0,0 +1,163 @@
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from pstatmodel.stepwise.parallel import run_stepwise_jobs, run_window_jobs
+
+
+def _design(X: pd.DataFrame, included: Sequence[str]) -> np.ndarray:
+    return np.column_stack(
+        [np.ones(X.shape[0]), X[list(included)].to_numpy(dtype=float)]
+    )
+
+
+def loo_hindcast(X: pd.DataFrame, y, included: Sequence[str]) -> pd.DataFrame:
+    """Leave-one-out hindcast of the OLS fit of y on X[included]
+    Arguments:
+        X - pandas.DataFrame with candidate features, one row per year
+        y - list-like with the target
+        included - selected features, e.g. the first output of
+            stepwise_selection
+    Returns: pandas.DataFrame indexed like X with the observed values, the
+        in-sample fit, the leverage, the PRESS residual and the
+        leave-one-out prediction of every year
+    Every year is held out at once through the hat-matrix diagonal h, the
+    PRESS residual being e / (1 - h), so the model is fitted only once.
+    """
+    _y = np.asarray(y, dtype=float)
+    Q, _ = np.linalg.qr(_design(X, included))
+    fitted = Q @ (Q.T @ _y)
+    leverage = (Q**2).sum(axis=1)
+    press = (_y - fitted) / (1 - leverage)
+    return pd.DataFrame(
+        {
+            "observed": _y,
+            "fitted": fitted,
+            "leverage": leverage,
+            "press_residual": press,
+            "prediction": _y - press,
+        },
+        index=X.index,
+    )
+
+
+def hindcast_skill(hindcast: pd.DataFrame) -> pd.Series:
+    """Skill of a hindcast table from loo_hindcast or loo_reselection_hindcast
+
+    PRESS, RMSE and MAE of the held-out predictions, their correlation with
+    the observations and the predictive R squared 1 - PRESS / TSS.
+    """
+    valid = hindcast.dropna(subset=["observed", "prediction"])
+    error = valid["observed"] - valid["prediction"]
+    press = (error**2).sum()
+    tss = ((valid["observed"] - valid["observed"].mean()) ** 2).sum()
+    return pd.Series(
+        {
+            "press": press,
+            "rmse": np.sqrt(press / valid.shape[0]),
+            "mae": error.abs().mean(),
+            "correlation": valid["observed"].corr(valid["prediction"]),
+            "predictive_rsquared": 1 - press / tss,
+            "nobs": valid.shape[0],
+        }
+    )
+
+
+def loo_reselection_hindcast(
+    X: pd.DataFrame, y, max_workers: Optional[int] = None, **kwargs
+) -> pd.DataFrame:
+    """Leave-one-out hindcast rerunning stepwise_selection inside every fold
+    Arguments:
+        X - pandas.DataFrame with candidate features, one row per year
+        y - list-like with the target
+        max_workers - size of the process pool running the folds
+        kwargs - passed to stepwise_selection
+    Returns: pandas.DataFrame indexed like X with the observed values, the
+        held-out prediction and the features selected without that year
+    Selecting on the training years only gives an honest skill estimate,
+    unlike loo_hindcast which keeps the selection made on every year.
+    """
+    _y = np.asarray(y, dtype=float)
+    nobs = _y.size
+    folds = [np.delete(np.arange(nobs), idx) for idx in range(nobs)]
+    jobs = [(_y[rows], "X", kwargs, rows) for rows in folds]
+    prediction = np.full(nobs, np.nan)
+    selected = [[] for _ in range(nobs)]
+    for idx, (included, _, _) in run_stepwise_jobs({"X": X}, jobs, max_workers):
+        selected[idx] = included
+        if not np.isnan(_y[folds[idx]]).any():
+            params, *_ = np.linalg.lstsq(
+                _design(X.iloc[folds[idx]], included), _y[folds[idx]], rcond=None
+            )
+            prediction[idx] = (_design(X.iloc[[idx]], included) @ params)[0]
+    return pd.DataFrame(
+        {"observed": _y, "prediction": prediction, "selected": selected},
+        index=X.index,
+    )
+
+
+def window_hindcast(
+    X: pd.DataFrame,
+    y,
+    first,
+    window: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """Rerun stepwise_selection on training windows sliding over the years
+    Arguments:
+        X - pandas.DataFrame with candidate features, one row per year
+        y - list-like with the target
+        first - label in the index of X of the last year of the first window
+        window - number of years in a rolling window, None for windows
+            expanding from the first year
+        max_workers - size of the process pool running the windows
+        kwargs - passed to stepwise_selection
+    Returns: pandas.DataFrame with one row per window, from the one ending
+        in ``first`` to the one ending in the last year: its first and last
+        year, nobs, the selected features, the final threshold_in, the in-sample
+        R squared, and the observed value and prediction of the following
+        year, NaN for the last window
+    The output works with hindcast_skill for the skill over all windows.
+    """
+    _y = np.asarray(y, dtype=float)
+    nobs = _y.size
+    windows = [
+        (0 if window is None else max(stop - window, 0), stop)
+        for stop in range(X.index.get_loc(first) + 1, nobs + 1)
+    ]
+    rows = [None] * len(windows)
+    for idx, (included, model, threshold) in run_window_jobs(
+        X, _y, windows, kwargs, max_workers
+    ):
+        start, stop = windows[idx]
+        observed = prediction = np.nan
+        if stop < nobs:
+            observed = _y[stop]
+            if included:
+                params = model.params.to_numpy()
+                prediction = params[0] + X.iloc[stop][included].to_numpy() @ params[1:]
+        rows[idx] = (
+            X.index[start],
+            X.index[stop - 1],
+            stop - start,
+            included,
+            threshold,
+            getattr(model, "rsquared", np.nan),
+            observed,
+            prediction,
+        )
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "start",
+            "end",
+            "nobs",
+            "selected",
+            "threshold_in",
+            "rsquared",
+            "observed",
+            "prediction",
+        ],
+    )
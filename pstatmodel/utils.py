@@ -5,7 +5,8 @@ from typing import List, Optional, Union
 
 import numpy as np
 import pandas as pd
-import requests
+
+from pstatmodel.download import fetch_text
 
 DATA_CONTAINTER = {
     "AAO": {
@@ -185,10 +186,15 @@ DATA_CONTAINTER = {
 }
 
 
-def _scrap_data(source: str) -> StringIO:
-    user_agent = "Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/79.0.3945.88 Safari/537.37"
-    data = requests.get(source, headers={"User-Agent": user_agent})
-    return StringIO(data.text)
+def _open_source(source, webscrap: bool = False):
+    """Remote sources go through the download cache, others are left as is"""
+    if not (isinstance(source, str) and source.startswith(("http://", "https://"))):
+        return source
+    headers = None
+    if webscrap is True:
+        user_agent = "Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/79.0.3945.88 Safari/537.37"
+        headers = {"User-Agent": user_agent}
+    return StringIO(fetch_text(source, headers=headers))
 
 
 def parse_fwf(
@@ -202,10 +208,7 @@ def parse_fwf(
     **kwargs: dict,
 ) -> pd.DataFrame:
 
-    if webscrap is True:
-        source = _scrap_data(source)
-
-    long_data = pd.read_fwf(source, **parse_kwargs)
+    long_data = pd.read_fwf(_open_source(source, webscrap), **parse_kwargs)
 
     if columns is not None:
         long_data = long_data.rename(columns=columns)
@@ -228,7 +231,7 @@ def wide_to_long(
     **kwargs: dict,
 ) -> pd.DataFrame:
 
-    wide_data = pd.read_fwf(source, **parse_kwargs)
+    wide_data = pd.read_fwf(_open_source(source), **parse_kwargs)
 
     if FILL_VALUE is None:
         FILL_VALUE = wide_data.iloc[-1, 0]
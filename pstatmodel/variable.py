@@ -1,8 +1,16 @@
-from dataclasses import dataclass, field
-from typing import List, Optional, Union
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import InitVar, dataclass, field
+from fnmatch import fnmatchcase
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
 
 import pandas as pd
 
+from pstatmodel.download import source_deadline
+from pstatmodel.stepwise.gram import GramMatrix
 from pstatmodel.utils import (
     DATA_CONTAINTER,
     decadeResampler,
@@ -17,11 +25,123 @@ DATA_PARSER = dict(wide=wide_to_long, long=parse_fwf, custom=None)
 DATA_RESAMPLER = dict(months=monthResampler, decades=decadeResampler)
 
 
-def default_variables():
+def select_sources(
+    names: Optional[List[str]] = None,
+    include: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+) -> Dict[str, dict]:
+    """Entries of DATA_CONTAINTER picked by name or by pattern
+    Arguments:
+        names - predictor names to keep, in this order
+        include - shell-style patterns (fnmatch), keep the predictors
+            matching any of them
+        exclude - shell-style patterns, drop the predictors matching any
+    Returns: dict of PredictorVariable arguments like DATA_CONTAINTER, every
+        entry when no argument is given
+    """
+    if names is not None:
+        unknown = [name for name in names if name not in DATA_CONTAINTER]
+        if unknown:
+            raise KeyError(
+                f"Unknown predictors {unknown}, choose from {list(DATA_CONTAINTER)}"
+            )
+        sources = {name: DATA_CONTAINTER[name] for name in names}
+    else:
+        sources = dict(DATA_CONTAINTER)
+    if include is not None:
+        sources = {
+            name: var_args
+            for name, var_args in sources.items()
+            if any(fnmatchcase(name, pattern) for pattern in include)
+        }
+    if exclude is not None:
+        sources = {
+            name: var_args
+            for name, var_args in sources.items()
+            if not any(fnmatchcase(name, pattern) for pattern in exclude)
+        }
+    return sources
+
+
+def default_variables(**kwargs):
+    """Lazy PredictorVariables of the sources picked by select_sources"""
     return {
-        name: PredictorVariable(name, **var_args)
-        for name, var_args in DATA_CONTAINTER.items()
+        name: PredictorVariable(name, lazy=True, **var_args)
+        for name, var_args in select_sources(**kwargs).items()
+    }
+
+
+def _run_per_host(
+    jobs: Dict[str, Tuple[str, Callable]],
+    max_workers: int = 8,
+    per_host: int = 2,
+    timeout: Optional[float] = 60.0,
+) -> Tuple[dict, Dict[str, Exception]]:
+    # jobs map a name to the source it reads and the call that reads it. Each
+    # host keeps its own queue and a job is only submitted once its host has
+    # a free slot, so a busy host never holds pool threads idle.
+    queues: Dict[str, deque] = {}
+    for name, (source, _) in jobs.items():
+        # custom tables have no host and share the "" queue
+        queues.setdefault(urlparse(source).netloc, deque()).append(name)
+    active = dict.fromkeys(queues, 0)
+    running: dict = {}
+
+    def _run(call: Callable):
+        with source_deadline(timeout):
+            return call()
+
+    def _fill(pool: ThreadPoolExecutor) -> None:
+        for host, queue in queues.items():
+            while queue and active[host] < per_host and len(running) < max_workers:
+                name = queue.popleft()
+                running[pool.submit(_run, jobs[name][1])] = (name, host)
+                active[host] += 1
+
+    outcomes = {}
+    with ThreadPoolExecutor(max_workers) as pool:
+        _fill(pool)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, host = running.pop(future)
+                active[host] -= 1
+                outcomes[name] = future
+            _fill(pool)
+    results, failures = {}, {}
+    for name in jobs:
+        try:
+            results[name] = outcomes[name].result()
+        except Exception as error:
+            print(f"Failed to load variable {name}: {error!r}")
+            failures[name] = error
+    return results, failures
+
+
+def load_variables(
+    sources: Dict[str, dict], **kwargs
+) -> Tuple[Dict[str, "PredictorVariable"], Dict[str, Exception]]:
+    """Build a PredictorVariable for every source concurrently
+    Arguments:
+        sources - mapping of predictor names to PredictorVariable arguments,
+            like DATA_CONTAINTER
+        max_workers - number of sources fetched and parsed at once
+        per_host - number of sources fetched at once from the same host
+        timeout - seconds each source may spend on its downloads, retries
+            and backoff included, None for no limit
+    Returns: (variables, failures), the PredictorVariables built and the
+        exception raised by every source that failed, both in the order of
+        sources
+    A failing source does not stop the others.
+    """
+    jobs = {
+        name: (
+            var_args.get("source", ""),
+            partial(PredictorVariable, name, **dict(var_args, lazy=False)),
+        )
+        for name, var_args in sources.items()
     }
+    return _run_per_host(jobs, **kwargs)
 
 
 @dataclass
@@ -31,9 +151,7 @@ class PredictorVariable:
     variable: Union[str, List[str]]
     format: str
     parse_kwargs: Optional[dict] = None
-    raw_data: Union[List[pd.DataFrame], pd.DataFrame, None] = field(
-        default=None, repr=False
-    )
+    table: InitVar[Optional[pd.DataFrame]] = None
     columns: dict[str, str] = None
     FILL_VALUE: float = None
     timefix: bool = True
@@ -41,8 +159,57 @@ class PredictorVariable:
     resample: List[str] = field(default_factory=list)
     use_seasons: bool = False
     period: List[int] = field(default_factory=lambda: [-12, 12])
+    lazy: bool = False
+    _raw_data: Union[List[pd.DataFrame], pd.DataFrame, None] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self, table: Optional[pd.DataFrame]) -> None:
+        # the custom table of from_dataframe, resampled by load
+        self._raw_data = table
+        self._loaded = False
+        self._lock = threading.Lock()
+        if not self.lazy:
+            self.load()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
 
-    def __post_init__(self) -> None:
+    @property
+    def raw_data(self) -> Union[List[pd.DataFrame], pd.DataFrame]:
+        return self.load()._raw_data
+
+    @raw_data.setter
+    def raw_data(self, value: Union[List[pd.DataFrame], pd.DataFrame]) -> None:
+        with self._lock:
+            self._raw_data = value
+            self._loaded = True
+
+    def load(self) -> "PredictorVariable":
+        """Fetch, parse and resample the source, once per instance
+
+        Lazy variables run this on the first access to ``raw_data`` or
+        ``shiftData``, the others when they are built. Threads calling it at
+        once wait for a single download.
+        """
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                    self._loaded = True
+        return self
+
+    def _load(self) -> None:
         _parser = DATA_PARSER[self.format]
         print(f"Loading variable {self.predictor}")
         if _parser is not None:
@@ -56,7 +223,7 @@ class PredictorVariable:
                 webscrap=self.webscrap,
             )
         else:
-            raw_data = self.raw_data
+            raw_data = self._raw_data
         if len(self.resample) != 0:
             _resampled = []
             for method in self.resample:
@@ -85,7 +252,7 @@ class PredictorVariable:
                     for _var in self.variable
                     if _var != "time"
                 ]
-        self.raw_data = _resampled[0] if len(_resampled) == 1 else _resampled
+        self._raw_data = _resampled[0] if len(_resampled) == 1 else _resampled
 
     def shiftData(self, **kwargs):
         if isinstance(self.raw_data, list):
@@ -110,7 +277,7 @@ class PredictorVariable:
             source="user-generated",
             variable=variable,
             format="custom",
-            raw_data=dataframe,
+            table=dataframe,
             **kwargs,
         )
 
@@ -118,6 +285,38 @@ class PredictorVariable:
 @dataclass
 class ModelVariables:
     variables: dict[str, PredictorVariable] = field(default_factory=default_variables)
+    failures: dict[str, Exception] = field(default_factory=dict, repr=False)
+    _statistics: dict = field(default_factory=dict, init=False, repr=False)
+
+    @classmethod
+    def from_names(
+        cls,
+        names: Optional[List[str]] = None,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+    ) -> "ModelVariables":
+        """Only the built-in predictors picked by select_sources
+
+        The others are never fetched, parsed, resampled nor shifted.
+        """
+        return cls(
+            variables=default_variables(names=names, include=include, exclude=exclude)
+        )
+
+    @classmethod
+    def from_sources(
+        cls, sources: Optional[Dict[str, dict]] = None, **kwargs
+    ) -> "ModelVariables":
+        """Load every source concurrently, DATA_CONTAINTER when None
+
+        Use select_sources to load only some of the built-in predictors.
+        kwargs are passed to load_variables. Sources that fail are left out
+        and their exceptions kept in ``failures``.
+        """
+        variables, failures = load_variables(
+            DATA_CONTAINTER if sources is None else sources, **kwargs
+        )
+        return cls(variables=variables, failures=failures)
 
     def register_variable(
         self,
@@ -130,8 +329,30 @@ class ModelVariables:
             var_name, variable, table, **kwargs
         )
 
+    def preload(
+        self, names: Optional[List[str]] = None, **kwargs
+    ) -> Dict[str, Exception]:
+        """Load the variables in ``names``, all when None, concurrently
+
+        kwargs are passed to load_variables. Returns the exception of every
+        variable that failed, which is also kept in ``failures``.
+        """
+        names = list(self.variables) if names is None else names
+        jobs = {
+            name: (self.variables[name].source, self.variables[name].load)
+            for name in names
+            if not self.variables[name].loaded
+        }
+        _, failures = _run_per_host(jobs, **kwargs)
+        self.failures.update(failures)
+        return failures
+
     def shiftAllVariables(self, **kwargs) -> None:
+        failures = self.preload()
+        if failures:
+            raise next(iter(failures.values()))
         self.shiftedVariables = []
+        self._statistics = {}
         for _predvar in self.variables.values():
             _predvar.shiftData(**kwargs)
             if isinstance(_predvar.shifted_data, list):
@@ -141,3 +362,20 @@ class ModelVariables:
 
     def get_datatable(self) -> pd.DataFrame:
         return pd.concat(self.shiftedVariables, axis=1)
+
+    def get_statistics(self, index=None) -> GramMatrix:
+        """Predictor statistics of the datatable, kept until the next shift
+
+        The GramMatrix of the rows in ``index`` (all rows when None) holds the
+        means, covariance, standard deviations and correlation matrix of the
+        predictors. It is computed on the first call for those rows and
+        shared by stepwise_selection, screen_candidates and the collinearity
+        routines through their ``gram`` argument.
+        """
+        key = None if index is None else tuple(index)
+        if key not in self._statistics:
+            table = self.get_datatable()
+            if index is not None:
+                table = table.loc[list(index)]
+            self._statistics[key] = GramMatrix(table)
+        return self._statistics[key]
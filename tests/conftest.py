@@ -0,0 +1,88 @@
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, dict(self.headers)))
+        server.clients.add(self.client_address)
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            time.sleep(server.delays.get(self.path, 0))
+            self._respond()
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _empty(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _respond(self):
+        server = self.server
+        if server.errors.get(self.path, 0) > 0:
+            server.errors[self.path] -= 1
+            return self._empty(503)
+        if self.path not in server.files:
+            return self._empty(404)
+        body = server.files[self.path]
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._empty(304)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    """Local stand-in for the remote sources
+
+    Serve bytes by assigning ``server.files[path]``, delay them with
+    ``server.delays[path]`` seconds and answer 503 to the next
+    ``server.errors[path]`` requests. Every request is kept in
+    ``server.requests`` as ``(path, headers)``, ``server.clients`` holds the
+    client addresses seen, ``server.peak`` is the most requests served at
+    once and ``server.url(path)`` gives the address to fetch.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.files = {}
+    server.delays = {}
+    server.errors = {}
+    server.clients = set()
+    server.requests = []
+    server.lock = threading.Lock()
+    server.active = server.peak = 0
+    server.url = lambda path: f"http://127.0.0.1:{server.server_port}{path}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def wide_body():
+    """Two years of a psl.noaa.gov style table in the NAO layout"""
+    rows = [" 2000 2001"] + [
+        f"{year:5d}" + "".join(f"{year % 100 + month / 10:7.2f}" for month in range(12))
+        for year in [2000, 2001]
+    ]
+    return "\n".join(rows + [" -99.9", "  NAO index", "  source"]).encode()
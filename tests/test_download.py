@@ -0,0 +1,93 @@
+from time import perf_counter
+
+import pandas as pd
+import pytest
+import requests
+
+from pstatmodel import download, utils
+
+
+def test_DownloadCache(http_server, tmp_path):
+    http_server.files["/index.txt"] = b"first"
+    url = http_server.url("/index.txt")
+
+    cache = download.DownloadCache(tmp_path, ttl=3600, offline=False)
+    assert cache.fetch(url) == "first"
+    assert cache.fetch(url) == "first"
+    assert len(http_server.requests) == 1
+
+    cache = download.DownloadCache(tmp_path, ttl=0, offline=False)
+    assert cache.fetch(url) == "first"
+    _, headers = http_server.requests[-1]
+    assert headers["If-None-Match"]
+    assert headers["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+    http_server.files["/index.txt"] = b"second"
+    assert cache.fetch(url) == "second"
+    assert len(http_server.requests) == 3
+
+    offline = download.DownloadCache(tmp_path, ttl=0, offline=True)
+    assert offline.fetch(url) == "second"
+    assert len(http_server.requests) == 3
+    with pytest.raises(download.OfflineError):
+        offline.fetch(http_server.url("/missing.txt"))
+
+    # a shared directory keeps the files the cache did not write
+    (tmp_path / "settings.json").write_text("{}")
+    cache.clear()
+    assert [path.name for path in tmp_path.iterdir()] == ["settings.json"]
+
+
+@pytest.mark.parametrize(
+    "value, offline",
+    [("1", True), ("true", True), ("Yes", True), ("on", True)]
+    + [("", False), ("0", False), ("false", False), ("no", False), ("off", False)],
+)
+def test_DownloadCache_offline_env(monkeypatch, tmp_path, value, offline):
+    monkeypatch.setenv("PSTATMODEL_OFFLINE", value)
+    assert download.DownloadCache(tmp_path).offline is offline
+
+
+def test_parse_through_cache(http_server, wide_body, tmp_path, monkeypatch):
+    http_server.files["/nao.data"] = wide_body
+    monkeypatch.setattr(
+        download, "DOWNLOAD_CACHE", download.DownloadCache(tmp_path, ttl=3600)
+    )
+    source = dict(utils.DATA_CONTAINTER["NAO"], source=http_server.url("/nao.data"))
+    first = utils.wide_to_long(**source)
+    assert first.shape == (24, 2)
+    assert first["NAO"].iloc[13] == pytest.approx(1.1)
+    pd.testing.assert_frame_equal(utils.wide_to_long(**source), first)
+    assert len(http_server.requests) == 1
+
+
+def test_Fetcher(http_server, wide_body, tmp_path):
+    fetcher = download.Fetcher(retries=2, backoff=0.01)
+    cache = download.DownloadCache(tmp_path, ttl=0, fetcher=fetcher)
+    for name in ["a", "b", "c"]:
+        http_server.files[f"/{name}.data"] = wide_body
+        assert cache.fetch(http_server.url(f"/{name}.data")) == wide_body.decode()
+    assert len(http_server.clients) == 1
+
+    http_server.errors["/a.data"] = 2
+    http_server.files["/a.data"] = b"changed"
+    assert cache.fetch(http_server.url("/a.data")) == "changed"
+    http_server.errors["/b.data"] = 3
+    with pytest.raises(requests.HTTPError):
+        cache.fetch(http_server.url("/b.data"))
+    assert cache.fetch(http_server.url("/c.data")) == wide_body.decode()
+
+    timings = cache.timings_frame()
+    assert timings["outcome"].tolist() == ["downloaded"] * 4 + ["not-modified"]
+    assert timings.loc[0, "nbytes"] == len(wide_body)
+    assert (timings["elapsed"] > 0).all()
+
+    # retries and backoff all fit in the deadline of the source
+    fetcher = download.Fetcher(retries=10, backoff=0.2)
+    cache = download.DownloadCache(tmp_path, ttl=0, timeout=60, fetcher=fetcher)
+    http_server.errors["/d.data"] = 100
+    http_server.delays["/d.data"] = 0.2
+    start = perf_counter()
+    with pytest.raises(requests.Timeout), download.source_deadline(1):
+        cache.fetch(http_server.url("/d.data"))
+    assert perf_counter() - start < 1.5
@@ -1,10 +1,22 @@
+import itertools
 import json
+import pickle
 
 import numpy as np
 import pandas as pd
 import pytest
+import statsmodels.api as sm
 
-from pstatmodel.stepwise import base
+from pstatmodel.stepwise import base, engine, parallel, subset, validation
+from pstatmodel.stepwise.cache import SubsetCache
+from pstatmodel.stepwise.collinearity import collinearity_clusters, variance_inflation
+from pstatmodel.stepwise.gram import GramMatrix
+from pstatmodel.stepwise.path import SelectionPath
+from pstatmodel.stepwise.result import CompactResult
+from pstatmodel.stepwise.screening import screen_candidates
+from pstatmodel.stepwise.stability import stability_selection
+from pstatmodel.stepwise.trace import SelectionTrace
+from pstatmodel.stepwise.update import SelectionUpdater
 
 predictors = pd.read_excel(
     "tests/data/Predcitores_IniJul_Gerardo_ec.xlsx", engine="openpyxl"
@@ -57,3 +69,575 @@ def test_base(testSet, predictors, expected):
     )
     assert model[0][0] == expected["vars"]
     np.testing.assert_equal(model[0][2], expected["pvalue"])
+
+
+def test_IncrementalOLS():
+    testSet, predictors, _ = shiftData(1)
+    columns = predictors.columns[[1, 10, 50, 3]]
+    fast = engine.IncrementalOLS(predictors, testSet)
+    reference = engine.StatsmodelsOLS(predictors, testSet)
+    for column in columns:
+        np.testing.assert_allclose(
+            fast.test_column(column), reference.test_column(column)
+        )
+        fast.add(column)
+        reference.add(column)
+    fast.drop(columns[1])
+    reference.drop(columns[1])
+    pd.testing.assert_series_equal(fast.pvalues(), reference.pvalues())
+    np.testing.assert_allclose(fast.rsquared, reference.rsquared)
+
+
+def test_IncrementalOLS_score():
+    testSet, predictors, _ = shiftData(2)
+    fast = engine.IncrementalOLS(predictors, testSet)
+    reference = engine.StatsmodelsOLS(predictors, testSet)
+    for column in predictors.columns[[5, 40]]:
+        fast.add(column)
+        reference.add(column)
+    candidates = list(predictors.columns[60:90])
+    for result, expected in zip(fast.score(candidates), reference.score(candidates)):
+        pd.testing.assert_series_equal(result, expected)
+
+
+def test_GramMatrix():
+    testSet, predictors, expected = shiftData(3)
+    gram = GramMatrix(predictors)
+    np.testing.assert_allclose(gram.XtX, predictors.T @ predictors)
+    np.testing.assert_allclose(gram.sums, predictors.sum())
+
+    fast = engine.GramOLS(predictors, testSet, gram=gram)
+    reference = engine.StatsmodelsOLS(predictors, testSet)
+    for column in predictors.columns[[1, 10, 50, 3]]:
+        fast.add(column)
+        reference.add(column)
+    fast.drop(predictors.columns[10])
+    reference.drop(predictors.columns[10])
+    pd.testing.assert_series_equal(fast.pvalues(), reference.pvalues())
+    candidates = list(predictors.columns[60:90])
+    for result, expected_score in zip(
+        fast.score(candidates), reference.score(candidates)
+    ):
+        pd.testing.assert_series_equal(result, expected_score)
+
+    selected, _, threshold = base.stepwise_selection(
+        predictors, testSet, verbose=False, gram=gram
+    )
+    assert selected == expected["vars"]
+    np.testing.assert_equal(threshold, expected["pvalue"])
+
+
+def test_GramOLS_collinear():
+    testSet, predictors, _ = shiftData(3)
+    predictors = predictors.iloc[:, :40].copy()
+    first, other = predictors.columns[:2]
+    predictors["dup"] = 3 * predictors[first] + 1
+    fast = engine.GramOLS(predictors, testSet)
+    fast.reset([first, other, "dup"])
+    assert fast.pvalues()["dup"] == 1
+    reference = engine.StatsmodelsOLS(predictors, testSet)
+    reference.reset([first, other])
+    pd.testing.assert_series_equal(fast.pvalues()[:2], reference.pvalues())
+    np.testing.assert_allclose(fast.rss, reference.rss)
+    scores = fast.score(list(predictors.columns[5:20]))
+    for result, expected_score in zip(
+        scores, reference.score(list(predictors.columns[5:20]))
+    ):
+        pd.testing.assert_series_equal(result, expected_score)
+    # without the column it copies, the duplicate is fitted again
+    fast.drop(first)
+    reference.reset([other, "dup"])
+    pd.testing.assert_series_equal(fast.pvalues(), reference.pvalues())
+
+    # the search goes on past the collinear pair instead of failing
+    selected, model, _ = base.stepwise_selection(
+        predictors, testSet, initial_list=[first, "dup"], engine="gram", verbose=False
+    )
+    assert selected and not {first, "dup"} <= set(selected)
+    assert np.isfinite(model.pvalues).all()
+
+
+def test_stepwise_selection_multi():
+    cases = [shiftData(x) for x in range(iTEST, fTEST)]
+    _, predictors, _ = cases[0]
+    cases = [case for case in cases if case[1].equals(predictors)]
+    targets = pd.concat([case[0] for case in cases], axis=1, keys=range(len(cases)))
+    results = base.stepwise_selection_multi(predictors, targets, verbose=False)
+    assert list(results.keys()) == list(targets.columns)
+    for (selected, model, threshold), (_, _, expected) in zip(results.values(), cases):
+        assert selected == expected["vars"]
+        np.testing.assert_equal(threshold, expected["pvalue"])
+
+    # the batched first step matches the one every engine would score
+    gram = GramMatrix(predictors)
+    XY = gram.crossprod(targets.to_numpy(dtype=float))
+    tss = np.array([_y @ _y for _y in map(gram.centre, targets.T.to_numpy())])
+    pvalues, rsquared = engine.score_alone(gram, XY, tss, predictors.columns)
+    for i, target in enumerate(targets):
+        ols = engine.GramOLS(predictors, targets[target], gram=gram, xy=XY[:, i])
+        score = ols.score(predictors.columns)
+        np.testing.assert_array_equal(score[0], pvalues.iloc[:, i])
+        np.testing.assert_array_equal(score[1], rsquared.iloc[:, i])
+
+    for kwargs in [dict(engine="qr"), dict(cache=SubsetCache())]:
+        with pytest.raises(TypeError):
+            base.stepwise_selection_multi(predictors, targets, **kwargs)
+    results = base.stepwise_selection_multi(
+        predictors, targets, verbose=False, cache=False
+    )
+    for (selected, _, _), (_, _, expected) in zip(results.values(), cases):
+        assert selected == expected["vars"]
+
+
+def test_run_stepwise_jobs():
+    cases = [shiftData(x) for x in range(iTEST, iTEST + 4)]
+    predictors = {str(idx): case[1] for idx, case in enumerate(cases)}
+    jobs = [(case[0], str(idx), dict(max_vars=12)) for idx, case in enumerate(cases)]
+    jobs.append((cases[0][0], "0", dict(engine="qr")))
+    results = dict(parallel.run_stepwise_jobs(predictors, jobs, max_workers=2))
+    assert sorted(results) == list(range(len(jobs)))
+    for idx, (_, _, expected) in enumerate(cases):
+        assert results[idx][0] == expected["vars"]
+        np.testing.assert_equal(results[idx][2], expected["pvalue"])
+    assert results[len(cases)][0] == results[0][0]
+
+
+def test_SubsetCache():
+    testSet, predictors, expected = shiftData(5)
+    cache = SubsetCache(maxsize=64)
+    for _ in range(2):
+        selected, _, threshold = base.stepwise_selection(
+            predictors, testSet, verbose=False, cache=cache
+        )
+        assert selected == expected["vars"]
+        np.testing.assert_equal(threshold, expected["pvalue"])
+    info = cache.info()
+    assert info["hits"] >= info["misses"] > 0
+    assert info["currsize"] == len(cache) <= 64
+
+    uncached = base.stepwise_selection(predictors, testSet, verbose=False, cache=False)
+    assert uncached[0] == selected
+
+
+def test_CompactResult():
+    testSet, predictors, expected = shiftData(4)
+    selected, model, _ = base.stepwise_selection(
+        predictors, testSet, verbose=False, compact=True
+    )
+    assert isinstance(model, CompactResult)
+    assert list(model.names) == selected == expected["vars"]
+    reference = model.model
+    assert model.nobs == reference.nobs
+    np.testing.assert_allclose(model.rsquared, reference.rsquared)
+    for attr in ["params", "bse", "pvalues"]:
+        pd.testing.assert_series_equal(
+            getattr(model, attr), getattr(reference, attr), check_names=False
+        )
+    assert model.summary() is not None
+
+    wide = pd.concat([predictors] * 5, axis=1, keys=range(5))
+    wide.columns = [f"{key}_{name}" for key, name in wide.columns]
+    compact = CompactResult.fit(wide, testSet, wide.columns[:4])
+    assert compact._data[0].shape == (testSet.size, 4)
+    full = sm.OLS(testSet, sm.add_constant(wide[wide.columns[:4]])).fit()
+    assert len(pickle.dumps(compact)) < len(pickle.dumps(full)) / 4
+    restored = pickle.loads(pickle.dumps(compact))
+    pd.testing.assert_series_equal(restored.params, compact.params)
+    with pytest.raises(ValueError):
+        restored.model
+
+
+def test_screen_candidates():
+    testSet, predictors, expected = shiftData(1)
+    result = screen_candidates(predictors, testSet, top=40)
+    np.testing.assert_allclose(
+        result["correlation"], predictors[result.index].corrwith(testSet)
+    )
+    assert result["retained"].sum() == 40
+    assert result["retained"].iloc[:40].all()
+
+    gram = GramMatrix(predictors)
+    result = screen_candidates(predictors, testSet, threshold=0.3, gram=gram)
+    assert (result.loc[result["retained"], "correlation"].abs() >= 0.3).all()
+
+    trace = SelectionTrace()
+    selected, _, threshold = base.stepwise_selection(
+        predictors,
+        testSet,
+        verbose=False,
+        screen=dict(top=predictors.columns.size),
+        trace=trace,
+    )
+    assert selected == expected["vars"]
+    np.testing.assert_equal(threshold, expected["pvalue"])
+    pd.testing.assert_frame_equal(
+        trace.screening, screen_candidates(predictors, testSet)
+    )
+    assert trace.events[0].event == "screen"
+    assert trace.events[0].candidates == predictors.columns.size
+
+    # a precomputed screening is used as is
+    result = screen_candidates(predictors, testSet, top=40)
+    trace = SelectionTrace()
+    base.stepwise_selection(
+        predictors, testSet, verbose=False, screen=result, trace=trace
+    )
+    assert trace.screening is result
+    assert trace.events[0].candidates == 40
+    assert trace.events[1].candidates == 40
+
+
+def test_SelectionTrace():
+    testSet, predictors, expected = shiftData(11)
+    received = []
+    trace = SelectionTrace(callback=received.append)
+    selected, _, _ = base.stepwise_selection(
+        predictors, testSet, verbose=False, trace=trace
+    )
+    assert selected == expected["vars"]
+    assert received == trace.events
+    events = trace.to_frame()
+    assert events["event"].iloc[0] == "start"
+    assert events["event"].iloc[-1] == "done"
+    assert {"add", "threshold", "restart"} <= set(events["event"])
+    assert events["fits"].is_monotonic_increasing
+    assert events["elapsed"].is_monotonic_increasing
+    assert trace.fits == events["fits"].iloc[-1] > 0
+
+
+def test_loo_hindcast():
+    testSet, predictors, expected = shiftData(1)
+    included = expected["vars"]
+    result = validation.loo_hindcast(predictors, testSet, included)
+    for year in [0, 17, testSet.size - 1]:
+        train = predictors.index != year
+        model = sm.OLS(
+            testSet[train], sm.add_constant(predictors.loc[train, included])
+        ).fit()
+        prediction = model.predict(
+            sm.add_constant(predictors[included]).loc[[year]]
+        ).iloc[0]
+        np.testing.assert_allclose(result.loc[year, "prediction"], prediction)
+    skill = validation.hindcast_skill(result)
+    assert skill["nobs"] == testSet.size
+    assert skill["predictive_rsquared"] < 1
+
+
+def test_loo_reselection_hindcast():
+    testSet, predictors, expected = shiftData(1)
+    predictors = predictors.iloc[:, :60]
+    result = validation.loo_reselection_hindcast(
+        predictors, testSet, max_workers=2, min_vars=2
+    )
+    assert result["prediction"].notna().all()
+    assert result["selected"].map(len).gt(0).all()
+    full = base.stepwise_selection(predictors, testSet, verbose=False, min_vars=2)
+    honest = validation.hindcast_skill(result)
+    optimistic = validation.hindcast_skill(
+        validation.loo_hindcast(predictors, testSet, full[0])
+    )
+    assert honest["press"] > 0 and optimistic["press"] > 0
+
+
+def test_window_hindcast():
+    testSet, predictors, _ = shiftData(1)
+    predictors = predictors.iloc[:, :60]
+    gram = GramMatrix(predictors.iloc[:20]).append(predictors.iloc[20:26])
+    reference = GramMatrix(predictors.iloc[4:26])
+    gram = gram.drop_head(4)
+    np.testing.assert_allclose(gram.centred, reference.centred, atol=1e-9)
+    np.testing.assert_allclose(
+        gram.crossprod(testSet[4:26]), reference.crossprod(testSet[4:26]), atol=1e-9
+    )
+
+    for window in [None, 20]:
+        result = validation.window_hindcast(
+            predictors, testSet, 25, window=window, max_workers=2, min_vars=2
+        )
+        assert result.shape[0] == testSet.size - 25
+        assert result["end"].tolist() == list(range(25, testSet.size))
+        assert np.isnan(result["prediction"].iloc[-1])
+        for idx in [0, result.shape[0] - 1]:
+            start, end = result.loc[idx, ["start", "end"]]
+            expected = base.stepwise_selection(
+                predictors.loc[start:end],
+                testSet.loc[start:end],
+                verbose=False,
+                min_vars=2,
+            )
+            assert result.loc[idx, "selected"] == expected[0]
+            assert result.loc[idx, "nobs"] == end - start + 1
+    assert validation.hindcast_skill(result)["nobs"] == result.shape[0] - 1
+
+
+def test_stability_selection(monkeypatch):
+    # weight the columns over several blocks
+    monkeypatch.setattr("pstatmodel.stepwise.gram._BLOCK", 64)
+    testSet, predictors, expected = shiftData(1)
+    rows = np.random.default_rng(0).integers(0, testSet.size, testSet.size)
+    gram = GramMatrix(predictors).resampled(rows)
+    reference = GramMatrix(predictors.iloc[rows])
+    np.testing.assert_allclose(gram.centred, reference.centred, atol=1e-8)
+    np.testing.assert_allclose(gram.XtX, reference.XtX)
+    np.testing.assert_allclose(gram.means, reference.means)
+    np.testing.assert_allclose(
+        gram.crossprod(testSet[rows]), reference.crossprod(testSet[rows]), atol=1e-8
+    )
+    targets = np.column_stack([testSet[rows], testSet[rows] ** 2])
+    np.testing.assert_allclose(
+        gram.crossprod(targets), reference.crossprod(targets), atol=1e-8
+    )
+    # only the positions are kept, the table is shared with the full GramMatrix
+    assert gram._centred_X is gram._base._centred_X
+
+    mask = np.arange(rows.size) % 5 != 0
+    masked = gram.masked(mask)
+    reference = GramMatrix(predictors.iloc[rows[mask]])
+    np.testing.assert_allclose(masked.centred, reference.centred, atol=1e-8)
+    np.testing.assert_allclose(masked.XtX, reference.XtX)
+    y = np.where(mask, testSet[rows], np.nan)
+    np.testing.assert_allclose(
+        masked.crossprod(y), reference.crossprod(y[mask]), atol=1e-8
+    )
+
+    resampled = base.stepwise_selection(
+        predictors, testSet[rows], verbose=False, rows=rows, compact=True, engine="gram"
+    )
+    copied = base.stepwise_selection(
+        predictors.iloc[rows], testSet[rows], verbose=False, engine="gram"
+    )
+    assert resampled[0] == copied[0]
+    np.testing.assert_allclose(resampled[1].params, copied[1].params)
+
+    predictors = predictors.iloc[:, :60]
+    result = stability_selection(
+        predictors, testSet, resamples=8, random_state=1, max_workers=2, min_vars=2
+    )
+    assert result.index.size == predictors.columns.size
+    assert result["frequency"].between(0, 1).all()
+    assert result["frequency"].is_monotonic_decreasing
+    assert result["count"].sum() >= 8 * 2
+
+
+def test_criterion_selection():
+    testSet, predictors, _ = shiftData(1)
+    predictors = predictors.iloc[:, :60]
+    reference = engine.StatsmodelsOLS(predictors, testSet)
+    reference.reset(list(predictors.columns[[3, 17, 40]]))
+    for name in ["qr", "gram"]:
+        ols = engine.ENGINES[name](predictors, testSet)
+        ols.reset(reference.included)
+        np.testing.assert_allclose(ols.drop_rss(), reference.drop_rss())
+
+    cache = SubsetCache()
+    results = {}
+    for criterion in ["aic", "bic", "adjr2"]:
+        results[criterion] = base.criterion_selection(
+            predictors, testSet, criterion=criterion, verbose=False, cache=cache
+        )
+        included, model, value = results[criterion]
+        assert 0 < len(included) <= 12
+        same = base.criterion_selection(
+            predictors, testSet, criterion=criterion, verbose=False, engine="gram"
+        )
+        assert same[0] == included
+        np.testing.assert_allclose(same[2], value)
+    assert cache.hits > 0
+    assert len(results["bic"][0]) <= len(results["aic"][0])
+
+    included, model, _ = results["adjr2"]
+    if len(included) < 12:
+        for column in set(predictors.columns) - set(included):
+            larger = sm.OLS(
+                testSet, sm.add_constant(predictors[included + [column]])
+            ).fit()
+            assert larger.rsquared_adj <= model.rsquared_adj + 1e-12
+    for column in included:
+        smaller = [other for other in included if other != column]
+        fit = sm.OLS(testSet, sm.add_constant(predictors[smaller])).fit()
+        assert fit.rsquared_adj <= model.rsquared_adj + 1e-12
+
+
+def test_collinearity():
+    from statsmodels.stats.outliers_influence import variance_inflation_factor
+
+    testSet, predictors, _ = shiftData(1)
+    table = predictors.iloc[:, :12]
+    design = sm.add_constant(table).to_numpy()
+    expected = [variance_inflation_factor(design, idx + 1) for idx in range(12)]
+    np.testing.assert_allclose(variance_inflation(table), expected, rtol=1e-6)
+    assert np.isinf(variance_inflation(predictors.iloc[:, :60])).all()
+
+    table = table.assign(copy=2 * table.iloc[:, 0] + 1, flat=1.0)
+    vif = variance_inflation(table)
+    assert np.isinf(vif[[table.columns[0], "copy"]]).all()
+    assert np.isnan(vif["flat"])
+
+    clusters = collinearity_clusters(table, threshold=0.99)
+    assert clusters.loc["copy", "cluster"] == clusters.iloc[0]["cluster"]
+    assert clusters.loc["copy", "size"] == 2
+    assert clusters["representative"].sum() == clusters["cluster"].nunique()
+    assert not clusters.loc["copy", "representative"]
+    clusters = collinearity_clusters(table, threshold=0.99, y=testSet)
+    assert clusters.loc[[table.columns[0], "copy"], "representative"].sum() == 1
+
+
+def test_best_subset_selection():
+    rng = np.random.default_rng(1)
+    predictors = pd.DataFrame(
+        rng.standard_normal((36, 12)), columns=[f"var{idx}" for idx in range(12)]
+    )
+    testSet = predictors["var1"] + 0.7 * predictors["var5"] + rng.standard_normal(36)
+    selected, model, threshold = subset.best_subset_selection(
+        predictors, testSet, min_vars=1, max_vars=4, verbose=False
+    )
+    best = {}
+    for size in range(1, 5):
+        for columns in itertools.combinations(predictors.columns, size):
+            ssr = sm.OLS(testSet, sm.add_constant(predictors[list(columns)])).fit().ssr
+            best[size] = min(best.get(size, (np.inf,)), (ssr, columns))
+    bic = {
+        size: 36 * np.log(ssr / 36) + np.log(36) * (size + 1)
+        for size, (ssr, _) in best.items()
+    }
+    assert sorted(selected) == sorted(best[min(bic, key=bic.get)][1])
+    assert threshold == model.pvalues.iloc[1:].max()
+
+    testSet, predictors, _ = shiftData(1)
+    selected, model, _ = subset.best_subset_selection(
+        predictors, testSet, time_budget=0.5, verbose=False, compact=True
+    )
+    assert 4 <= len(selected) <= 12
+    assert list(model.names) == selected
+
+
+def test_SelectionPath():
+    testSet, predictors, expected = shiftData(11)
+    selection = SelectionPath(predictors, testSet)
+    selected, _, threshold = selection.select()
+    assert selected == expected["vars"]
+    np.testing.assert_equal(threshold, expected["pvalue"])
+
+    grid = selection.grid(threshold_in=[0.03, 0.05], min_vars=[3, 4])
+    misses = selection.cache.misses
+    assert grid.equals(selection.grid(threshold_in=[0.03, 0.05], min_vars=[3, 4]))
+    assert selection.cache.misses == misses
+    for row in grid.itertuples():
+        result = base.stepwise_selection(
+            predictors,
+            testSet,
+            threshold_in=row.threshold_in,
+            min_vars=row.min_vars,
+            verbose=False,
+        )
+        assert result[0] == row.included
+        assert result[2] == row.final_threshold_in
+
+
+def test_missing_drop():
+    cases = [shiftData(x) for x in range(iTEST, fTEST)]
+    _, predictors, _ = cases[0]
+    targets = pd.concat(
+        [case[0] for case in cases if case[1].equals(predictors)][:3], axis=1
+    ).set_axis(["a", "b", "c"], axis=1)
+    targets.iloc[[3, 10], [0, 2]] = np.nan
+    targets.iloc[5, 1] = np.nan
+
+    gram = GramMatrix(predictors)
+    valid = targets["a"].notna()
+    masked = gram.masked(valid)
+    reference = GramMatrix(predictors[valid])
+    np.testing.assert_allclose(masked.centred, reference.centred, atol=1e-9)
+    np.testing.assert_allclose(masked.sums, reference.sums)
+    np.testing.assert_allclose(
+        masked.crossprod(targets["a"]),
+        reference.crossprod(targets.loc[valid, "a"]),
+        atol=1e-9,
+    )
+
+    assert base.stepwise_selection(predictors, targets["a"], verbose=False)[0] == []
+    results = base.stepwise_selection_multi(
+        predictors, targets, gram=gram, verbose=False, missing="drop"
+    )
+    assert list(results) == ["a", "b", "c"]
+    for target in targets:
+        valid = targets[target].notna()
+        expected = base.stepwise_selection(
+            predictors[valid], targets.loc[valid, target], verbose=False
+        )
+        selected, model, threshold = results[target]
+        assert selected == expected[0]
+        assert threshold == expected[2]
+        assert model.nobs == valid.sum()
+
+    # screening reads the rows where each target is valid
+    screen = dict(top=60)
+    results = base.stepwise_selection_multi(
+        predictors, targets, gram=gram, verbose=False, missing="drop", screen=screen
+    )
+    for target in targets:
+        valid = targets[target].notna()
+        expected = base.stepwise_selection(
+            predictors[valid], targets.loc[valid, target], verbose=False, screen=screen
+        )
+        assert results[target][0] == expected[0]
+        assert results[target][2] == expected[2]
+        assert expected[0]
+    pd.testing.assert_frame_equal(
+        screen_candidates(predictors, targets["a"]),
+        screen_candidates(predictors[valid], targets.loc[valid, "a"]),
+    )
+
+
+def test_missing_rows_engine(monkeypatch):
+    testSet, predictors, _ = shiftData(5)
+    predictors = predictors.iloc[:, :40]
+    built = []
+
+    class Spy(engine.StatsmodelsOLS):
+        def __init__(self, X, y):
+            built.append(X.shape[0])
+            super().__init__(X, y)
+
+    monkeypatch.setitem(engine.ENGINES, "statsmodels", Spy)
+    y = testSet.copy()
+    y.iloc[[2, 7]] = np.nan
+    valid = y.notna()
+    rows = np.flatnonzero(valid)[::-1]
+    for options in [dict(missing="drop"), dict(rows=rows)]:
+        _y = y if "missing" in options else y.iloc[rows]
+        result = base.stepwise_selection(
+            predictors, _y, engine="statsmodels", verbose=False, **options
+        )
+        reference = base.stepwise_selection(
+            predictors[valid], y[valid], engine="gram", verbose=False
+        )
+        assert result[0] == reference[0]
+        assert result[2] == reference[2]
+        assert built.pop() == valid.sum()
+
+
+def test_SelectionUpdater():
+    testSet, predictors, _ = shiftData(3)
+    gram = GramMatrix(predictors.iloc[:-2]).append(predictors.iloc[-2:])
+    reference = GramMatrix(predictors)
+    np.testing.assert_allclose(gram.centred, reference.centred, atol=1e-9)
+    np.testing.assert_allclose(gram.XtX, reference.XtX)
+    np.testing.assert_allclose(
+        gram.crossprod(testSet), reference.crossprod(testSet), atol=1e-9
+    )
+
+    for case, cut in [(3, 2), (5, 1), (6, 3)]:
+        testSet, predictors, _ = shiftData(case)
+        updater = SelectionUpdater(predictors.iloc[:-cut], testSet.iloc[:-cut])
+        for year in range(-cut, 0):
+            previous = updater.result
+            changed = updater.append(predictors.iloc[[year]], testSet.iloc[[year]])
+            same = updater.result[0] == previous[0] and updater.result[2] == previous[2]
+            assert changed != same
+        assert updater.result[1].nobs == testSet.size
+        pd.testing.assert_frame_equal(updater.X, predictors, check_dtype=False)
+        pd.testing.assert_series_equal(updater.y, testSet, check_names=False)
+        expected = base.stepwise_selection(predictors, testSet, verbose=False)
+        assert updater.result[0] == expected[0]
+        assert updater.result[2] == expected[2]
@@ -1,7 +1,13 @@
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
 import pytest
+import requests
 
-from pstatmodel import ModelVariables, PredictorVariable
+from pstatmodel import ModelVariables, PredictorVariable, download, variable
+from pstatmodel.stepwise.gram import GramMatrix
 from pstatmodel.utils import DATA_CONTAINTER, monthResampler
 
 
@@ -124,3 +130,148 @@ def test_ModelVariables():
 
     final_df = Model.get_datatable()
     assert not final_df.empty
+
+
+def test_ModelVariables_statistics():
+    Model = ModelVariables(variables={})
+    ecData = pd.read_csv("tests/data/ec_ersstv5.txt", parse_dates=[0])
+    Model.register_variable("EC_index", ["E_add", "C_add"], ecData)
+    Model.shiftAllVariables(init_month="08", fyear=2020)
+    years = Model.get_datatable().dropna().index
+    stats = Model.get_statistics(years)
+    assert Model.get_statistics(years) is stats
+    assert GramMatrix.from_variables(Model, years) is stats
+
+    table = Model.get_datatable().loc[years]
+    np.testing.assert_allclose(stats.means, table.mean())
+    np.testing.assert_allclose(stats.std, table.std())
+    np.testing.assert_allclose(stats.covariance, table.cov())
+    np.testing.assert_allclose(stats.correlation, table.corr())
+
+    Model.shiftAllVariables(init_month="09", fyear=2020)
+    assert Model.get_statistics(years) is not stats
+
+
+def test_ModelVariables_from_sources(http_server, wide_body, tmp_path, monkeypatch):
+    monkeypatch.setattr(download, "DOWNLOAD_CACHE", download.DownloadCache(tmp_path))
+    names = ["NAO", "WP", "SOI", "ONI"]
+    sources = {}
+    for name in names:
+        http_server.files[f"/{name}.data"] = wide_body
+        http_server.delays[f"/{name}.data"] = 0.2
+        sources[name] = dict(
+            DATA_CONTAINTER["NAO"], source=http_server.url(f"/{name}.data")
+        )
+    sources["ONI"]["source"] = http_server.url("/missing.data")
+    http_server.delays["/WP.data"] = 2
+    Model = ModelVariables.from_sources(sources, per_host=2, timeout=1)
+
+    assert list(Model.variables) == ["NAO", "SOI"]
+    assert list(Model.failures) == ["WP", "ONI"]
+    assert isinstance(Model.failures["WP"], requests.Timeout)
+    assert isinstance(Model.failures["ONI"], requests.HTTPError)
+    assert http_server.peak == 2
+    assert Model.variables["NAO"].raw_data.shape == (24, 2)
+
+
+def test_ModelVariables_per_host(http_server, wide_body, tmp_path, monkeypatch):
+    monkeypatch.setattr(download, "DOWNLOAD_CACHE", download.DownloadCache(tmp_path))
+    sources = {}
+    for name in ["NAO", "WP", "SOI"]:
+        http_server.files[f"/{name}.data"] = wide_body
+        http_server.delays[f"/{name}.data"] = 0.5
+        sources[name] = dict(
+            DATA_CONTAINTER["NAO"], source=http_server.url(f"/{name}.data")
+        )
+    # same server through another host name, not held back by the busy one
+    sources["SOI"]["source"] = sources["SOI"]["source"].replace(
+        "127.0.0.1", "localhost"
+    )
+    Model = ModelVariables.from_sources(sources, max_workers=2, per_host=1)
+
+    assert list(Model.variables) == ["NAO", "WP", "SOI"]
+    paths = [path for path, _ in http_server.requests]
+    assert paths == ["/NAO.data", "/SOI.data", "/WP.data"]
+
+
+def test_lazy_PredictorVariable(http_server, wide_body, tmp_path, monkeypatch):
+    monkeypatch.setattr(download, "DOWNLOAD_CACHE", download.DownloadCache(tmp_path))
+    variables = {}
+    for name in ["NAO", "WP", "SOI"]:
+        http_server.files[f"/{name}.data"] = wide_body
+        source = dict(
+            DATA_CONTAINTER["NAO"],
+            source=http_server.url(f"/{name}.data"),
+            variable=name,
+        )
+        variables[name] = PredictorVariable(name, lazy=True, **source)
+    Model = ModelVariables(variables=variables)
+    assert not http_server.requests
+    assert not Model.variables["NAO"].loaded
+
+    assert Model.variables["NAO"].raw_data.shape == (24, 2)
+    assert Model.variables["NAO"].loaded
+    assert len(http_server.requests) == 1
+
+    assert Model.preload(["NAO", "WP"]) == {}
+    assert len(http_server.requests) == 2
+    assert not Model.variables["SOI"].loaded
+
+    Model.shiftAllVariables(init_month="08", fyear=2002)
+    assert all(variable.loaded for variable in Model.variables.values())
+    assert len(http_server.requests) == 3
+    assert Model.get_datatable().shape == (2002 - 1975, 36)
+
+
+def test_lazy_threads(http_server, wide_body, tmp_path, monkeypatch):
+    monkeypatch.setattr(download, "DOWNLOAD_CACHE", download.DownloadCache(tmp_path))
+    http_server.files["/NAO.data"] = wide_body
+    http_server.delays["/NAO.data"] = 0.3
+    source = dict(DATA_CONTAINTER["NAO"], source=http_server.url("/NAO.data"))
+    Variable = PredictorVariable("NAO", lazy=True, **source)
+    # comparing, copying and replacing never downloads
+    assert Variable == dataclasses.replace(Variable)
+    assert "_raw_data" in dataclasses.asdict(Variable)
+    assert not http_server.requests
+
+    with ThreadPoolExecutor(4) as pool:
+        tables = list(pool.map(lambda _: Variable.raw_data, range(4)))
+    assert len(http_server.requests) == 1
+    assert all(table is tables[0] for table in tables)
+
+
+def test_lazy_failure(http_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(download, "DOWNLOAD_CACHE", download.DownloadCache(tmp_path))
+    source = dict(DATA_CONTAINTER["NAO"], source=http_server.url("/missing.data"))
+    Model = ModelVariables(
+        variables={"NAO": PredictorVariable("NAO", lazy=True, **source)}
+    )
+    failures = Model.preload()
+    assert isinstance(failures["NAO"], requests.HTTPError)
+    assert Model.failures == failures
+    with pytest.raises(requests.HTTPError):
+        Model.shiftAllVariables(init_month="08", fyear=2002)
+
+
+def test_ModelVariables_from_names(http_server, wide_body, tmp_path, monkeypatch):
+    assert list(ModelVariables.from_names(["SOI", "NAO"]).variables) == ["SOI", "NAO"]
+    Model = ModelVariables.from_names(include=["A*"], exclude=["AMI"])
+    assert list(Model.variables) == ["AAO", "AO", "AMM"]
+    assert "RMM" not in ModelVariables.from_names(exclude=["RMM"]).variables
+    with pytest.raises(KeyError):
+        ModelVariables.from_names(["NAO", "XYZ"])
+
+    monkeypatch.setattr(download, "DOWNLOAD_CACHE", download.DownloadCache(tmp_path))
+    containers = {}
+    for name in ["NAO", "WP", "SOI"]:
+        http_server.files[f"/{name}.data"] = wide_body
+        containers[name] = dict(
+            DATA_CONTAINTER["NAO"],
+            source=http_server.url(f"/{name}.data"),
+            variable=name,
+        )
+    monkeypatch.setattr(variable, "DATA_CONTAINTER", containers)
+    Model = ModelVariables.from_names(include=["?O*"])
+    Model.shiftAllVariables(init_month="08", fyear=2002)
+    assert [path for path, _ in http_server.requests] == ["/SOI.data"]
+    assert Model.get_datatable().columns.str.startswith("SOI").all()